@@ -0,0 +1,75 @@
+"""
+Batch - Run chat completion requests through the OpenAI Batch API
+Batched requests cost half as much but may take up to 24 hours, so this is only for unattended runs
+"""
+
+import json
+import time
+
+try:
+    from ._llm_cache import CACHE_DIR, cache_key
+    from ._files import atomic_write
+except ImportError:  # run directly as a script
+    from _llm_cache import CACHE_DIR, cache_key
+    from _files import atomic_write
+
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+def batch_chat(client, requests, use_cache=True, poll_interval=10, max_poll_interval=300):
+    """Run {custom_id: request} through one batch job and return {custom_id: message text}
+
+    Requests already in the completion cache are answered from it and left out of
+    the batch; new completions are added to the cache.
+    """
+    results = {}
+    lines = []
+    for custom_id, request in requests.items():
+        cache_path = CACHE_DIR / f"{cache_key(request)}.txt"
+        if use_cache and cache_path.exists():
+            results[custom_id] = cache_path.read_text(encoding="utf-8")
+            continue
+        lines.append(json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": request}))
+
+    if not lines:
+        return results
+
+    upload = client.files.create(file=("batch.jsonl", ("\n".join(lines) + "\n").encode("utf-8")), purpose="batch")
+    batch = client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h")
+    print(f"📦 Submitted batch {batch.id} ({len(lines)} requests), waiting for it to complete...")
+
+    # Poll with exponential backoff; batches usually take minutes to hours
+    delay = poll_interval
+    while batch.status not in FINAL_STATUSES:
+        time.sleep(delay)
+        delay = min(delay * 2, max_poll_interval)
+        batch = client.batches.retrieve(batch.id)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise SystemExit(f"❌ Batch {batch.id} ended with status '{batch.status}'")
+
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        content = response["body"]["choices"][0]["message"]["content"]
+        results[item["custom_id"]] = content
+        if use_cache and content:
+            cache_path = CACHE_DIR / f"{cache_key(requests[item['custom_id']])}.txt"
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(cache_path) as file:
+                file.write(content)
+
+    failed = [custom_id for custom_id in requests if custom_id not in results]
+    if failed:
+        raise SystemExit(f"❌ Batch {batch.id} returned no completion for: {', '.join(failed)}")
+
+    return results
+
+def batch_chat_list(client, requests, use_cache=True):
+    """Run a list of requests through one batch job and return their message texts in the same order"""
+    # Whatever the caller would name a request by (e.g. a section title) may not be a valid custom_id, so key by position
+    results = batch_chat(client, {f"request-{i}": request for i, request in enumerate(requests)}, use_cache)
+    return [results[f"request-{i}"] for i in range(len(requests))]
@@ -0,0 +1,37 @@
+"""
+Caveman - Rule-based stripping of politeness, hedging and filler from fixed prompt text
+Off unless KAIA_CAVEMAN=1, so output quality can be compared with and without it
+"""
+
+import os
+import re
+
+RULES = [
+    # Politeness and request framing
+    (re.compile(r"\b(?:please|kindly)\s+", re.IGNORECASE), ""),
+    (re.compile(r"\b(?:could|would|can) you\s+", re.IGNORECASE), ""),
+    (re.compile(r"\bI would like(?: you)?(?: to)?\s+", re.IGNORECASE), ""),
+    (re.compile(r"\bI want you to\s+", re.IGNORECASE), ""),
+    # Hedging
+    (re.compile(r"\b(?:it seems|it appears|I (?:think|believe))(?: that)?\s+", re.IGNORECASE), ""),
+    (re.compile(r"\b(?:probably|possibly|maybe|perhaps)\s+", re.IGNORECASE), ""),
+    # Filler adjectives in front of a noun ("a detailed, comprehensive plan" -> "a plan"), fixing up a/an;
+    # one followed by a conjunction or preposition is predicative ("Be thorough and specific.") and is kept
+    (re.compile(r"\b(?:(an?) )?(?:(?:very|highly) )?(?:detailed|comprehensive|thorough|well-structured|extensive),?\s+"
+                r"(?!(?:and|or|but|nor|yet|in|on|at|with|about|to|for|of|than|as)\b)(?=(\w))", re.IGNORECASE),
+     lambda m: "" if not m.group(1) else (m.group(1)[0] + ("n " if m.group(2).lower() in "aeiou" else " "))),
+    # Spaces left behind inside lines (leading indentation is kept)
+    (re.compile(r"(?<=\S)[ \t]{2,}"), " "),
+]
+
+def enabled():
+    """Whether caveman compression is switched on"""
+    return os.getenv("KAIA_CAVEMAN") == "1"
+
+def caveman(text):
+    """Strip filler from fixed prompt text when KAIA_CAVEMAN=1, otherwise return it unchanged"""
+    if not enabled():
+        return text
+    for pattern, replacement in RULES:
+        text = pattern.sub(replacement, text)
+    return text
@@ -0,0 +1,12 @@
+"""
+CLI - Argument types shared by the pipeline scripts' command lines
+"""
+
+import argparse
+
+def positive_int(value):
+    """argparse type for --max-concurrency: an integer of at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
@@ -0,0 +1,109 @@
+"""
+Compress - Extractive compression of generated markdown to fit a prompt token budget
+Drops the least informative prose sentences; headers, code blocks and tables are always kept
+"""
+
+import math
+import re
+from collections import Counter
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=\S)")
+# Indentation, list marker and "**Label:**" kept in front of whatever sentences of a line survive;
+# a marker needs whitespace after it, so the "*" of a bold label is not mistaken for one
+PREFIX_RE = re.compile(r"\s*(?:(?:[-*+]|\d+[.)])\s+)?(?:\*\*[^*\n]+\*\*:?\s*)?")
+WORD_RE = re.compile(r"[a-z0-9]+")
+FENCE = "```"
+
+# Weights of the sentence score components
+POSITION_WEIGHT = 0.40
+TFIDF_WEIGHT = 0.35
+CENTRALITY_WEIGHT = 0.25
+
+# Sentences at the start and end of the document are always kept
+KEEP_FIRST = 3
+KEEP_LAST = 2
+
+def estimate_tokens(text):
+    """Rough token count for English prose (about four characters per token)"""
+    return math.ceil(len(text) / 4)
+
+def split_units(text):
+    """Split text into (prefix, sentences) lines; protected lines have no sentences and keep their text as prefix"""
+    lines = []
+    in_fence = False
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith(FENCE):
+            in_fence = not in_fence
+            lines.append((line, []))
+        elif in_fence or not stripped or stripped.startswith(("#", "|")):
+            lines.append((line, []))
+        else:
+            prefix = PREFIX_RE.match(line).group()
+            lines.append((prefix, SENTENCE_RE.split(line[len(prefix):])))
+    return lines
+
+def score_sentences(lines):
+    """Score every prose sentence by position within its section, TF-IDF weight and centrality"""
+    sentences = []  # (line index, piece index, words)
+    position = {}
+    section_start = 0
+    for i, (prefix, pieces) in enumerate(lines):
+        if not pieces and prefix.lstrip().startswith("#"):
+            section_start = len(sentences)
+        for j, piece in enumerate(pieces):
+            position[(i, j)] = len(sentences) - section_start
+            sentences.append((i, j, WORD_RE.findall(piece.lower())))
+
+    doc_freq = Counter(word for _, _, words in sentences for word in set(words))
+    doc_tf = Counter(word for _, _, words in sentences for word in words)
+    doc_norm = math.sqrt(sum(count * count for count in doc_tf.values())) or 1.0
+    total = len(sentences)
+
+    raw = {}
+    for i, j, words in sentences:
+        counts = Counter(words)
+        tfidf = sum(count * math.log(total / doc_freq[word]) for word, count in counts.items()) / (len(words) or 1)
+        norm = math.sqrt(sum(count * count for count in counts.values())) or 1.0
+        centrality = sum(count * doc_tf[word] for word, count in counts.items()) / (norm * doc_norm)
+        raw[(i, j)] = (1.0 / (1 + position[(i, j)]), tfidf, centrality)
+
+    max_tfidf = max((value[1] for value in raw.values()), default=0) or 1.0
+    max_centrality = max((value[2] for value in raw.values()), default=0) or 1.0
+    scores = {
+        key: POSITION_WEIGHT * pos + TFIDF_WEIGHT * tfidf / max_tfidf + CENTRALITY_WEIGHT * centrality / max_centrality
+        for key, (pos, tfidf, centrality) in raw.items()
+    }
+    order = [(i, j) for i, j, _ in sentences]
+    return scores, order
+
+def compress(text, budget_tokens):
+    """Return text shortened to about budget_tokens by dropping low-scoring prose sentences"""
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+
+    lines = split_units(text)
+    scores, order = score_sentences(lines)
+
+    keep = set(order[:KEEP_FIRST]) | set(order[-KEEP_LAST:])
+    used = sum(estimate_tokens(prefix) for prefix, _ in lines)
+    used += sum(estimate_tokens(lines[i][1][j]) for i, j in keep)
+
+    for key in sorted(scores, key=scores.get, reverse=True):
+        if key in keep:
+            continue
+        cost = estimate_tokens(lines[key[0]][1][key[1]])
+        if used + cost > budget_tokens:
+            continue
+        keep.add(key)
+        used += cost
+
+    output = []
+    for i, (prefix, pieces) in enumerate(lines):
+        if not pieces:
+            output.append(prefix)
+            continue
+        kept = [piece for j, piece in enumerate(pieces) if (i, j) in keep]
+        if kept:
+            output.append(prefix + " ".join(kept))
+    return "\n".join(output)
@@ -0,0 +1,34 @@
+"""
+Files - Shared file helpers for the pipeline scripts
+When master_auto runs the scripts in-process, each input document is read and decoded once;
+outputs are written atomically so an interrupted step never leaves a truncated file behind
+"""
+
+import contextlib
+import functools
+import os
+import threading
+
+@functools.lru_cache(maxsize=None)
+def _read_text(path, mtime_ns, size):
+    """Read and decode a file; cached per (path, mtime, size) so rewrites are picked up"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+def read_text(path):
+    """Return the UTF-8 text of a file, reusing the decoded text while the file is unchanged"""
+    stat = os.stat(path)
+    return _read_text(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+@contextlib.contextmanager
+def atomic_write(path, encoding='utf-8'):
+    """Open path for writing; the text goes to a temporary sibling that replaces path only if the block completes"""
+    # Unique per process and thread, so concurrent writers of the same path don't share a temporary file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, 'w', encoding=encoding) as file:
+            yield file
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
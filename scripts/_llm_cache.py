@@ -0,0 +1,94 @@
+"""
+LLM Cache - On-disk cache of chat completion text keyed by a hash of the request
+Re-running a script on unchanged inputs returns the stored completion instead of calling the API
+"""
+
+import functools
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+
+try:
+    from ._files import atomic_write
+except ImportError:  # run directly as a script
+    from _files import atomic_write
+
+CACHE_DIR = Path.home() / ".cache" / "kaia"
+
+MAX_ATTEMPTS = 6
+MAX_BACKOFF = 60
+
+def cache_key(request):
+    """Return the SHA-256 hex digest identifying a chat completion request"""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def cache_path(request):
+    """Return the cache file holding the completion text of a request"""
+    return CACHE_DIR / f"{cache_key(request)}.txt"
+
+def evict(request):
+    """Drop the cached completion of a request, e.g. one whose text turned out to be unusable"""
+    cache_path(request).unlink(missing_ok=True)
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors():
+    """Return the transient OpenAI errors worth retrying; an exhausted quota is a RateLimitError too, but is not retried"""
+    # Imported here so that importing a script (e.g. for load_template) doesn't load the SDK
+    import openai
+    return (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+def create_with_retry(client, **request):
+    """Call client.chat.completions.create(**request), retrying transient errors with exponential backoff and jitter"""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return client.chat.completions.create(**request)
+        except retryable_errors() as e:
+            if attempt == MAX_ATTEMPTS or getattr(e, "code", None) == "insufficient_quota":
+                raise
+            delay = random.uniform(1, min(MAX_BACKOFF, 2 ** attempt))
+            print(f"⚠️  {type(e).__name__}, retrying in {delay:.1f}s (attempt {attempt}/{MAX_ATTEMPTS})")
+            time.sleep(delay)
+
+def cached_chat(client, use_cache=True, stream_to=(), **request):
+    """Call client.chat.completions.create(**request) and return the message text, using the cache when allowed
+
+    When stream_to holds file-like objects, the completion is streamed and every
+    chunk is written to each of them as it arrives (a cache hit is written in one go).
+    Completions cut off at max_tokens are returned but not cached.
+    """
+    path = cache_path(request)
+
+    if use_cache and path.exists():
+        content = path.read_text(encoding="utf-8")
+        for sink in stream_to:
+            sink.write(content)
+        return content
+
+    if stream_to:
+        parts = []
+        finish_reason = None
+        for chunk in create_with_retry(client, **request, stream=True):
+            if chunk.choices:
+                finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            for sink in stream_to:
+                sink.write(delta)
+                sink.flush()
+        content = "".join(parts)
+    else:
+        response = create_with_retry(client, **request)
+        content = response.choices[0].message.content
+        finish_reason = getattr(response.choices[0], "finish_reason", None)
+
+    if use_cache and content and finish_reason != "length":
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(path) as file:
+            file.write(content)
+
+    return content
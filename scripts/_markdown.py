@@ -0,0 +1,27 @@
+"""
+Markdown - Split generated markdown documents into their "## " sections
+Used to send only the sections a prompt needs instead of whole documents
+"""
+
+import re
+
+H2_RE = re.compile(r"^## (.*)$", re.MULTILINE)
+
+def iter_sections(content):
+    """Yield (title, start, end) for each "## " section; content[start:end] is its header line and body"""
+    matches = H2_RE.finditer(content)
+    current = next(matches, None)
+    while current:
+        following = next(matches, None)
+        # The newline ending a body belongs to the next header line
+        end = following.start() - 1 if following else len(content)
+        yield current.group(1), current.start(), end
+        current = following
+
+def extract_sections(content, names):
+    """Keep only the "## " sections whose title is in names, in document order"""
+    return "\n".join(
+        "\n" + content[start:end]
+        for title, start, end in iter_sections(content)
+        if title.strip() in names
+    )
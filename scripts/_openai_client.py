@@ -0,0 +1,37 @@
+"""
+OpenAI Client - One OpenAI client per process, shared by every pipeline script
+The SDK keeps HTTP connections alive, so sharing the client reuses them across steps and requests
+"""
+
+import contextlib
+import functools
+import os
+
+@functools.lru_cache(maxsize=None)
+def get_client():
+    """Return the process-wide OpenAI client, creating it from OPENAI_API_KEY (.env supported) on first use"""
+    # Imported on first use so that merely importing a script stays cheap
+    from openai import OpenAI
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise SystemExit("❌ OPENAI_API_KEY not found in environment variables. Please set it in .env file")
+
+    # No preflight request: an invalid key or exhausted quota surfaces on the first real call
+    return OpenAI(api_key=api_key)
+
+@contextlib.contextmanager
+def api_errors():
+    """Stop with a one-line message when the API rejects the key or the quota is exhausted"""
+    # Imported on entry, after the caller has parsed its arguments, so --help doesn't load the SDK
+    import openai
+
+    try:
+        yield
+    except openai.AuthenticationError:
+        raise SystemExit("❌ Invalid API key or no billing set up.")
+    except openai.RateLimitError:
+        raise SystemExit("❌ API quota exhausted. Add credits in the dashboard.")
@@ -0,0 +1,59 @@
+"""
+Plan Cache - Reuse action plans from earlier runs on similar product ideas
+Product ideas are indexed by embedding in a small SQLite database next to the completion cache
+"""
+
+import json
+import math
+import sqlite3
+
+try:
+    from ._llm_cache import CACHE_DIR
+except ImportError:  # run directly as a script
+    from _llm_cache import CACHE_DIR
+
+PLAN_DB = CACHE_DIR / "plans.db"
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+def embed(client, text):
+    """Return the embedding vector of text"""
+    return client.embeddings.create(model=EMBEDDING_MODEL, input=text).data[0].embedding
+
+def cosine(a, b):
+    """Cosine similarity of two vectors"""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+def connect():
+    """Open the plan database, creating it on first use"""
+    PLAN_DB.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(PLAN_DB)
+    db.execute("CREATE TABLE IF NOT EXISTS plans (idea TEXT, embedding TEXT, action_plan TEXT)")
+    return db
+
+def find_similar_plan(embedding, threshold):
+    """Return (similarity, idea, action_plan) of the closest stored plan, or None below threshold"""
+    db = connect()
+    try:
+        rows = db.execute("SELECT idea, embedding, action_plan FROM plans").fetchall()
+    finally:
+        db.close()
+
+    best = max(
+        ((cosine(embedding, json.loads(stored)), idea, plan) for idea, stored, plan in rows),
+        default=None,
+        key=lambda match: match[0]
+    )
+    if best and best[0] >= threshold:
+        return best
+    return None
+
+def store_plan(embedding, idea, action_plan):
+    """Remember the action plan generated for a product idea"""
+    db = connect()
+    try:
+        with db:
+            db.execute("INSERT INTO plans VALUES (?, ?, ?)", (idea, json.dumps(embedding), action_plan))
+    finally:
+        db.close()
@@ -0,0 +1,68 @@
+"""
+Validation - The validation tracking file shared by the PRD and Technical Specification steps
+prd_auto writes it, both steps add findings, and later corrections fill in its closing section
+"""
+
+import os
+
+try:
+    from ._files import atomic_write
+except ImportError:  # run directly as a script
+    from _files import atomic_write
+
+VALIDATION_TEMPLATE = """# Technical Validation Tracking
+
+This document tracks validation findings and corrections applied to the technical architecture.
+
+## Validation Findings by Section
+
+{findings}## Corrections Applied
+
+*This section will be updated after post-generation corrections are applied.*
+
+### Architecture Changes Made
+- *Pending correction analysis*
+
+### Validation Issues Resolved
+- *Pending correction analysis*
+
+### Remaining Open Issues
+- *Pending correction analysis*
+"""
+
+def write_validation_file(validation_file, findings):
+    """Write the validation tracking file with the given (section, finding) pairs in a single replace."""
+    os.makedirs(os.path.dirname(validation_file), exist_ok=True)
+    with atomic_write(validation_file) as f:
+        f.write(VALIDATION_TEMPLATE.format(
+            findings="".join(f"### {section}\n{finding}\n\n" for section, finding in findings)
+        ))
+
+def add_validation_finding(validation_file, section, finding):
+    """Add a validation finding to the tracking file, ahead of its Corrections Applied section.
+
+    A finding already recorded for the section (e.g. by an earlier run of the same step) is replaced.
+    """
+    if not os.path.exists(validation_file):
+        print(f"⚠️  Validation file not found: {validation_file}")
+        return
+
+    entry = f"### {section}\n{finding}\n\n"
+    with open(validation_file, "r+") as f:
+        content = f.read()
+        start = content.find(f"\n### {section}\n")
+        if start != -1:
+            # The earlier finding runs up to the next finding or section heading
+            ends = [i for i in (content.find("\n### ", start + 1), content.find("\n## ", start + 1)) if i != -1]
+            end = min(ends, default=len(content))
+            content = content[:start + 1] + entry + content[end + 1:]
+        else:
+            # Findings belong with the others, not after the trailing Corrections Applied section
+            start = content.find("\n## Corrections Applied")
+            if start == -1:
+                content += entry
+            else:
+                content = content[:start + 1] + entry + content[start + 1:]
+        f.seek(0)
+        f.write(content)
+        f.truncate()
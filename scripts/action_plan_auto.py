@@ -3,209 +3,175 @@
 Action Plan Auto - Generate Action Plan from Technical Specification markdown file
 """
 
-import os
 import sys
 import argparse
+import functools
+import re
 from pathlib import Path
-from openai import OpenAI
-from dotenv import load_dotenv
+
+try:
+    from ._llm_cache import cached_chat
+    from ._files import read_text, atomic_write
+    from ._markdown import extract_sections
+    from ._compress import compress, estimate_tokens
+    from ._caveman import caveman
+    from ._openai_client import get_client
+except ImportError:  # run directly as a script
+    from _llm_cache import cached_chat
+    from _files import read_text, atomic_write
+    from _markdown import extract_sections
+    from _compress import compress, estimate_tokens
+    from _caveman import caveman
+    from _openai_client import get_client
+
+TEMPLATE_PATH = Path(__file__).parent.parent / "templates" / "action_plan_template.md"
+
+@functools.lru_cache(maxsize=None)
+def load_template(template_path=TEMPLATE_PATH):
+    """Read the action plan template once per process"""
+    return Path(template_path).read_text(encoding='utf-8')
+
+PLACEHOLDER_RE = re.compile(r"(\{\{(?:SPEC_MD|PRD_MD|PRODUCT_NAME)\}\})")
+
+@functools.lru_cache(maxsize=None)
+def template_parts(template_path=TEMPLATE_PATH):
+    """Split the template once into literal text and placeholder segments"""
+    return tuple(PLACEHOLDER_RE.split(caveman(load_template(template_path))))
+
+def render_template(values, template_path=TEMPLATE_PATH):
+    """Fill the {{PLACEHOLDER}} segments of the template in a single join"""
+    return "".join(values.get(part, part) for part in template_parts(template_path))
+
+# Critical sections for action plan generation - expanded for better context
+TECH_SPEC_CRITICAL_SECTIONS = frozenset({
+    "Purpose & Scope",
+    "High-Level Architecture Diagram",
+    "Data Flow & Sequence Diagrams",
+    "Key Components",
+    "External Integrations & APIs",
+    "Data Models & Schemas",
+    "Implementation Roadmap",
+})
+PRD_CRITICAL_SECTIONS = frozenset({"User Requirements", "Product Overview"})
+CRITICAL_SECTIONS = {"tech_spec": TECH_SPEC_CRITICAL_SECTIONS, "prd": PRD_CRITICAL_SECTIONS}
+
+# Prompt token budgets; longer sections are shortened by extractive compression
+SPEC_TOKEN_BUDGET = 4000
+PRD_TOKEN_BUDGET = 2000
 
 def extract_critical_sections(content, content_type):
     """Extract only the most critical sections to reduce token usage"""
-    
-    if content_type == "tech_spec":
-        # Critical sections for action plan generation - expanded for better context
-        critical_sections = [
-            "Purpose & Scope",
-            "High-Level Architecture Diagram", 
-            "Data Flow & Sequence Diagrams",
-            "Key Components",
-            "External Integrations & APIs",
-            "Data Models & Schemas",
-            "Implementation Roadmap"        ]
-        
-        extracted_content = []
-        lines = content.split('\n')
-        current_section = None
-        in_critical_section = False
-        
-        for line in lines:
-            # Check if this is a section header
-            if line.startswith('## '):
-                section_name = line.replace('## ', '').strip()
-                if section_name in critical_sections:
-                    current_section = section_name
-                    in_critical_section = True
-                    extracted_content.append(f"\n{line}")
-                else:
-                    in_critical_section = False
-            elif in_critical_section:
-                extracted_content.append(line)
-        
-        return '\n'.join(extracted_content)
-    
-    elif content_type == "prd":
-        # Critical sections for action plan generation
-        critical_sections = [
-            "User Requirements",
-            "Product Overview"
-        ]
-        
-        extracted_content = []
-        lines = content.split('\n')
-        current_section = None
-        in_critical_section = False
-        
-        for line in lines:
-            # Check if this is a section header
-            if line.startswith('## '):
-                section_name = line.replace('## ', '').strip()
-                if section_name in critical_sections:
-                    current_section = section_name
-                    in_critical_section = True
-                    extracted_content.append(f"\n{line}")
-                else:
-                    in_critical_section = False
-            elif in_critical_section:
-                extracted_content.append(line)
-        
-        return '\n'.join(extracted_content)
-    
+    if content_type in CRITICAL_SECTIONS:
+        return extract_sections(content, CRITICAL_SECTIONS[content_type])
     return content
 
 def extract_prd_user_requirements(prd_content):
     """Extract only the 'User Requirements' and 'Product Overview' sections from the PRD."""
-    sections_to_keep = ["Product Overview", "User Requirements"]
-    extracted = []
-    lines = prd_content.split('\n')
-    in_section = False
-    for line in lines:
-        if line.startswith('## '):
-            section = line.replace('## ', '').strip()
-            in_section = section in sections_to_keep
-            if in_section:
-                extracted.append(f"\n{line}")
-        elif in_section:
-            extracted.append(line)
-    return '\n'.join(extracted)
+    return extract_critical_sections(prd_content, "prd")
 
-def generate_action_plan(client, spec_content, prd_content=None):
-    """Generate Action Plan using OpenAI API with template"""
+def generate_action_plan(client, spec_content, prd_content=None, use_cache=True, stream_to=(), model="gpt-4o-mini"):
+    """Generate Action Plan using OpenAI API with template, streaming it to stream_to as it arrives"""
     
-    # Extract critical sections from tech spec
-    critical_spec = extract_critical_sections(spec_content, "tech_spec")
+    # Extract critical sections from tech spec, compressed to the prompt budget
+    critical_spec = compress(extract_critical_sections(spec_content, "tech_spec"), SPEC_TOKEN_BUDGET)
     
     print(f"📊 Using critical sections only:")
-    print(f"   Technical Spec: {len(spec_content.split())} words → {len(critical_spec.split())} words")
+    print(f"   Technical Spec: ~{estimate_tokens(spec_content):,} tokens → ~{estimate_tokens(critical_spec):,} tokens")
     if prd_content:
-        prd_user_reqs = extract_prd_user_requirements(prd_content)
-        print(f"   PRD: {len(prd_content.split())} words → {len(prd_user_reqs.split())} words (user requirements only)")
+        prd_user_reqs = compress(extract_prd_user_requirements(prd_content), PRD_TOKEN_BUDGET)
+        print(f"   PRD: ~{estimate_tokens(prd_content):,} tokens → ~{estimate_tokens(prd_user_reqs):,} tokens (user requirements only)")
     else:
         prd_user_reqs = None
     
-    # Load the action plan template
-    template_path = Path(__file__).parent.parent / "templates" / "action_plan_template.md"
-    
+    # Fill the action plan template with critical sections only
     try:
-        with open(template_path, 'r', encoding='utf-8') as file:
-            template_content = file.read()
+        prompt = render_template({
+            "{{SPEC_MD}}": critical_spec,
+            # If no PRD provided, use a placeholder
+            "{{PRD_MD}}": prd_user_reqs or "No PRD provided - using technical specification only.",
+            "{{PRODUCT_NAME}}": "Product",
+        })
     except FileNotFoundError:
-        print(f"Error: Template file '{template_path}' not found")
+        print(f"Error: Template file '{TEMPLATE_PATH}' not found")
         return None
     except Exception as e:
         print(f"Error reading template file: {e}")
         return None
     
-    # Replace placeholders in template with critical sections only
-    prompt = template_content.replace("{{SPEC_MD}}", critical_spec)
-    
-    if prd_user_reqs:
-        prompt = prompt.replace("{{PRD_MD}}", prd_user_reqs)
-    else:
-        # If no PRD provided, use a placeholder
-        prompt = prompt.replace("{{PRD_MD}}", "No PRD provided - using technical specification only.")
-    
-    # Replace product name placeholder
-    prompt = prompt.replace("{{PRODUCT_NAME}}", "Product")
-    
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
+        return cached_chat(
+            client,
+            use_cache,
+            stream_to,
+            model=model,
             messages=[
-                {"role": "system", "content": "You are a pragmatic Technical Lead collaborating with a Senior Product Manager. Generate actionable, implementation-focused content."},
+                {"role": "system", "content": caveman("You are a pragmatic Technical Lead collaborating with a Senior Product Manager. Generate actionable, implementation-focused content.")},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
             max_tokens=2000
         )
-        return response.choices[0].message.content
     except Exception as e:
         print(f"Error generating Action Plan: {e}")
         return None
 
-def main():
+def main(argv=None, client=None, spec_content=None, prd_content=None):
     parser = argparse.ArgumentParser(description='Generate Action Plan from Technical Specification markdown file')
     parser.add_argument('tech_spec_file', help='Path to Technical Specification markdown file')
     parser.add_argument('--prd-file', help='Path to PRD file for additional context (optional)')
     parser.add_argument('--output', default='output/action_plan.md', help='Output file path (default: output/action_plan.md)')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing a cached completion')
+    parser.add_argument('--model', default='gpt-4o-mini', help='OpenAI model (default: gpt-4o-mini)')
+    parser.add_argument('--no-stream', action='store_true', help="Don't stream the plan to the terminal (for running alongside other steps, whose output would be spliced into it)")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    # Load environment variables
-    load_dotenv()
+    if client is None:
+        client = get_client()
     
-    # Check for API key
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        print("Error: OPENAI_API_KEY not found in environment variables")
-        print("Please set your OpenAI API key in a .env file or environment variable")
-        sys.exit(1)
-    
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
-    
-    # Read technical specification file
-    try:
-        with open(args.tech_spec_file, 'r', encoding='utf-8') as file:
-            spec_content = file.read().strip()
-    except FileNotFoundError:
-        print(f"Error: Technical specification file '{args.tech_spec_file}' not found")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error reading technical specification file: {e}")
-        sys.exit(1)
+    # Read technical specification file, unless the caller (spec_auto) already holds its text
+    if spec_content is None:
+        try:
+            spec_content = read_text(args.tech_spec_file).strip()
+        except FileNotFoundError:
+            print(f"Error: Technical specification file '{args.tech_spec_file}' not found")
+            sys.exit(1)
+        except Exception as e:
+            print(f"Error reading technical specification file: {e}")
+            sys.exit(1)
     
     # Read PRD file if provided
-    prd_content = None
-    if args.prd_file:
+    if prd_content is None and args.prd_file:
         try:
-            with open(args.prd_file, 'r', encoding='utf-8') as file:
-                prd_content = file.read().strip()
+            prd_content = read_text(args.prd_file).strip()
         except FileNotFoundError:
             print(f"Warning: PRD file '{args.prd_file}' not found, proceeding without PRD context")
         except Exception as e:
             print(f"Warning: Error reading PRD file: {e}, proceeding without PRD context")
     
-    # Generate Action Plan
-    print("Generating Action Plan...")
-    action_plan_content = generate_action_plan(client, spec_content, prd_content)
-    
-    if not action_plan_content:
-        print("Failed to generate Action Plan")
-        sys.exit(1)
-    
     # Create output directory if it doesn't exist
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Write output
+    # Generate Action Plan, streaming it to the output file (and stdout, when running alone) as it arrives;
+    # the file only replaces output_path once complete, so the next pipeline step never reads a partial plan
+    print("Generating Action Plan...")
     try:
-        with open(output_path, 'w', encoding='utf-8') as file:
-            file.write(action_plan_content)
-        print(f"✅ Action Plan generated successfully: {output_path}")
+        with atomic_write(output_path) as file:
+            action_plan_content = generate_action_plan(
+                client, spec_content, prd_content,
+                use_cache=not args.no_cache, stream_to=(file,) if args.no_stream else (file, sys.stdout), model=args.model
+            )
+            if not args.no_stream:
+                print()
+            if not action_plan_content:
+                print("Failed to generate Action Plan")
+                sys.exit(1)
     except Exception as e:
         print(f"Error writing output file: {e}")
         sys.exit(1)
+    
+    print(f"✅ Action Plan generated successfully: {output_path}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -4,17 +4,35 @@ GTM Auto - Generate Go-To-Market Plan from PRD and Technical Specification
 Creates a comprehensive GTM strategy with SWOT analysis
 """
 
-import os
 import sys
 import argparse
 from pathlib import Path
-from openai import OpenAI
-from dotenv import load_dotenv
 
-def generate_gtm_plan(client, prd_content, tech_spec_content):
-    """Generate Go-To-Market Plan using OpenAI API"""
+try:
+    from ._files import read_text, atomic_write
+    from ._llm_cache import cached_chat
+    from ._compress import compress
+    from ._caveman import caveman
+    from ._openai_client import get_client
+except ImportError:  # run directly as a script
+    from _files import read_text, atomic_write
+    from _llm_cache import cached_chat
+    from _compress import compress
+    from _caveman import caveman
+    from _openai_client import get_client
+
+# Prompt token budgets; longer documents are shortened by extractive compression
+PRD_TOKEN_BUDGET = 4000
+SPEC_TOKEN_BUDGET = 4000
+
+def generate_gtm_plan(client, prd_content, tech_spec_content, model="gpt-4o-mini", use_cache=True, stream_to=()):
+    """Generate Go-To-Market Plan using OpenAI API, streaming it to stream_to as it arrives"""
+    
+    # Keep the prompt within budget for long documents
+    prd_content = compress(prd_content, PRD_TOKEN_BUDGET)
+    tech_spec_content = compress(tech_spec_content, SPEC_TOKEN_BUDGET)
     
-    prompt = """You are an expert Product Marketing Manager creating a comprehensive Go-To-Market Plan.
+    prompt = caveman("""You are an expert Product Marketing Manager creating a comprehensive Go-To-Market Plan.
 
 PRD CONTENT:
 {prd_content}
@@ -48,48 +66,41 @@ Please create a detailed Go-To-Market Plan that includes:
 - Launch phases
 - Post-launch optimization
 
-Please provide a well-structured, actionable GTM plan that can guide marketing and business development efforts.""".format(prd_content=prd_content, tech_spec_content=tech_spec_content)
+Please provide a well-structured, actionable GTM plan that can guide marketing and business development efforts.""").format(prd_content=prd_content, tech_spec_content=tech_spec_content)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
+        return cached_chat(
+            client,
+            use_cache,
+            stream_to,
+            model=model,
             messages=[
-                {"role": "system", "content": "You are an expert Product Marketing Manager and Competitive Intelligence Analyst with extensive experience in creating comprehensive Go-To-Market strategies. Focus on actionable insights, clear positioning, and measurable outcomes."},
+                {"role": "system", "content": caveman("You are an expert Product Marketing Manager and Competitive Intelligence Analyst with extensive experience in creating comprehensive Go-To-Market strategies. Focus on actionable insights, clear positioning, and measurable outcomes.")},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
             max_tokens=4000
         )
-        return response.choices[0].message.content
     except Exception as e:
         print(f"Error generating GTM Plan: {e}")
         return None
 
-def main():
+def main(argv=None, client=None):
     parser = argparse.ArgumentParser(description='Generate Go-To-Market Plan from PRD and Technical Specification')
     parser.add_argument('prd_file', help='Path to PRD markdown file')
     parser.add_argument('tech_spec_file', help='Path to Technical Specification markdown file')
     parser.add_argument('-o', '--output', help='Output file path (default: output/gtm_plan.md)')
+    parser.add_argument('--model', default='gpt-4o-mini', help='OpenAI model (default: gpt-4o-mini)')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing a cached completion')
     
-    args = parser.parse_args()
-    
-    # Load environment variables
-    load_dotenv()
-    
-    # Check for API key
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        print("Error: OPENAI_API_KEY not found in environment variables")
-        print("Please set your OpenAI API key in a .env file or environment variable")
-        sys.exit(1)
+    args = parser.parse_args(argv)
     
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
+    if client is None:
+        client = get_client()
     
     # Read PRD file
     try:
-        with open(args.prd_file, 'r', encoding='utf-8') as file:
-            prd_content = file.read().strip()
+        prd_content = read_text(args.prd_file).strip()
     except FileNotFoundError:
         print(f"Error: PRD file '{args.prd_file}' not found")
         sys.exit(1)
@@ -99,8 +110,7 @@ def main():
     
     # Read Technical Specification file
     try:
-        with open(args.tech_spec_file, 'r', encoding='utf-8') as file:
-            tech_spec_content = file.read().strip()
+        tech_spec_content = read_text(args.tech_spec_file).strip()
     except FileNotFoundError:
         print(f"Error: Technical specification file '{args.tech_spec_file}' not found")
         sys.exit(1)
@@ -108,14 +118,6 @@ def main():
         print(f"Error reading technical specification file: {e}")
         sys.exit(1)
     
-    # Generate GTM Plan
-    print("Generating Go-To-Market Plan...")
-    gtm_content = generate_gtm_plan(client, prd_content, tech_spec_content)
-    
-    if not gtm_content:
-        print("Failed to generate GTM Plan")
-        sys.exit(1)
-    
     # Determine output path
     if args.output:
         output_path = args.output
@@ -125,14 +127,23 @@ def main():
     # Create output directory if it doesn't exist
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     
-    # Write output
+    # Generate GTM Plan, streaming it to the output file as it arrives; the file only
+    # replaces output_path once complete, so a failure never leaves a partial plan behind
+    print("Generating Go-To-Market Plan...")
     try:
-        with open(output_path, 'w', encoding='utf-8') as file:
-            file.write(gtm_content)
-        print(f"Go-To-Market Plan generated successfully: {output_path}")
+        with atomic_write(output_path) as file:
+            gtm_content = generate_gtm_plan(
+                client, prd_content, tech_spec_content,
+                model=args.model, use_cache=not args.no_cache, stream_to=(file,)
+            )
+            if not gtm_content:
+                print("Failed to generate GTM Plan")
+                sys.exit(1)
     except Exception as e:
         print(f"Error writing output file: {e}")
         sys.exit(1)
+    
+    print(f"Go-To-Market Plan generated successfully: {output_path}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -7,66 +7,242 @@ Runs all automation scripts in sequence with versioned output files
 import os
 import sys
 import argparse
+import asyncio
+import importlib
+import hashlib
+import json
+import re
+import shutil
 import subprocess
 import tempfile
 from pathlib import Path
 from datetime import datetime
 
-def run_script(script_name, args, description):
-    """Run a Python script and return success status"""
+try:
+    from ._llm_cache import cached_chat, evict
+    from ._plan_cache import embed, find_similar_plan, store_plan
+    from ._files import read_text, atomic_write
+    from ._caveman import caveman, enabled as caveman_enabled
+    from ._openai_client import get_client
+except ImportError:  # run directly as a script
+    from _llm_cache import cached_chat, evict
+    from _plan_cache import embed, find_similar_plan, store_plan
+    from _files import read_text, atomic_write
+    from _caveman import caveman, enabled as caveman_enabled
+    from _openai_client import get_client
+
+VERSION_RE = re.compile(r"_v(\d+)\.md$")
+STATE_FILE = ".kaia_pipeline_state.json"
+SCRIPTS_DIR = Path(__file__).parent
+TEMPLATES_DIR = SCRIPTS_DIR.parent / "templates"
+BUFSIZE = 64 * 1024
+
+# --one-shot: document key -> (sentinel name, output file prefix, what the section must contain)
+ONE_SHOT_DOCUMENTS = {
+    'prd': ("PRD", "prd", "Product Requirements Document: product overview, target users, user requirements, features, success metrics"),
+    'spec': ("SPEC", "tech_spec", "Technical Specification: architecture, key components, data flow, data models, integrations, non-functional requirements, security, implementation roadmap"),
+    'action_plan': ("ACTION_PLAN", "action_plan", "Action Plan: setup checklist and 3-6 milestones, each with goal, key tasks and deliverables"),
+    'milestones': ("MILESTONES", "milestone_specs", "Milestone Specifications: for each milestone, technical requirements, implementation guide, testing & validation, dependencies"),
+    'gtm': ("GTM", "gtm_plan", "Go-To-Market Plan: target segments, positioning, messaging pillars, launch tactics, SWOT analysis, launch timeline"),
+}
+SECTION_RE = re.compile(r"<!-- SECTION:(\w+) -->")
+# Flags naming files a step writes rather than reads, left out of its step key
+OUTPUT_FLAGS = {"--output", "--validation-output", "--validation-file"}
+
+def load_script(module_name):
+    """Import a pipeline script as a module, whether run as a script or as part of the scripts package"""
+    if __package__:
+        return importlib.import_module(f"{__package__}.{module_name}")
+    return importlib.import_module(module_name)
+
+def run_script_subprocess(module_name, args, description):
+    """Run a pipeline script in a separate Python process and return success status"""
+    cmd = [sys.executable, str(SCRIPTS_DIR / f"{module_name}.py")] + args
+    print(f"Running: {' '.join(cmd)}")
+    
+    # One merged pipe drained line by line: the child never blocks on a full pipe, its output
+    # shows up live, and steps running side by side interleave whole lines rather than fragments
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=BUFSIZE, text=True, env=env) as proc:
+        for line in proc.stdout:
+            print(f"[{module_name}] {line}", end="")
+    
+    if proc.returncode == 0:
+        print(f"✅ {description} completed successfully")
+        return True
+    print(f"❌ {description} failed with exit code {proc.returncode}")
+    return False
+
+def run_script(module_name, args, description, client, legacy_subprocess=False):
+    """Run a pipeline script's main() in-process (or, with legacy_subprocess, as a child process) and return success status"""
     print(f"\n{'='*60}")
     print(f"🚀 {description}")
     print(f"{'='*60}")
     
-    script_path = Path(__file__).parent / script_name
-    if not script_path.exists():
-        print(f"❌ Error: Script {script_name} not found at {script_path}")
-        return False
+    if legacy_subprocess:
+        return run_script_subprocess(module_name, args, description)
     
     try:
-        # Build command
-        cmd = [sys.executable, str(script_path)] + args
-        print(f"Running: {' '.join(cmd)}")
-        
-        # Run script
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        module = load_script(module_name)
+        print(f"Running: {module_name} {' '.join(args)}")
         
-        if result.stdout:
-            print(result.stdout)
-        if result.stderr:
-            print("Warnings/Errors:", result.stderr)
+        # Run script with the shared OpenAI client
+        module.main(args, client=client)
         
         print(f"✅ {description} completed successfully")
         return True
         
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed with exit code {e.returncode}")
-        if e.stdout:
-            print("Output:", e.stdout)
-        if e.stderr:
-            print("Error:", e.stderr)
+    except SystemExit as e:
+        # Scripts report failures through sys.exit() / SystemExit("message")
+        if e.code in (None, 0):
+            print(f"✅ {description} completed successfully")
+            return True
+        if isinstance(e.code, str):
+            print(e.code)
+        print(f"❌ {description} failed with exit code {e.code if isinstance(e.code, int) else 1}")
         return False
     except Exception as e:
         print(f"❌ Error running {description}: {e}")
         return False
 
+async def run_scripts_concurrently(jobs, client, legacy_subprocess=False):
+    """Run independent (module_name, args, description) jobs concurrently in worker threads"""
+    return await asyncio.gather(*(asyncio.to_thread(run_script, *job, client, legacy_subprocess) for job in jobs))
+
 def get_next_version(output_dir):
     """Get the next version number for output files"""
-    if not output_dir.exists():
+    # Extract version numbers from filenames like "prd_v1.md" -> 1; one scandir pass over plain names
+    try:
+        with os.scandir(output_dir) as entries:
+            versions = [int(m.group(1)) for entry in entries if (m := VERSION_RE.search(entry.name)) and entry.is_file()]
+    except FileNotFoundError:
         return 1
+    return max(versions, default=0) + 1
+
+def load_state(output_dir):
+    """Load the step keys and outputs recorded by earlier runs in output_dir"""
+    try:
+        return json.loads((Path(output_dir) / STATE_FILE).read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_state(output_dir, state):
+    """Record the step keys and outputs of this run"""
+    with atomic_write(Path(output_dir) / STATE_FILE) as file:
+        json.dump(state, file, indent=2)
+
+def step_key(module_name, args, templates=()):
+    """Hash everything a step's output depends on: its script and the _*.py helpers, input files, templates, flags (not its output paths) and KAIA_CAVEMAN"""
+    digest = hashlib.sha256(module_name.encode())
+    digest.update((SCRIPTS_DIR / f"{module_name}.py").read_bytes())
+    # The _*.py helpers (extraction, compression, caching, ...) shape every step's prompt too
+    for helper in sorted(SCRIPTS_DIR.glob("_*.py")):
+        digest.update(helper.read_bytes())
+    # Caveman mode rewrites the prompts, so runs with and without it never reuse each other's outputs
+    digest.update(b"caveman=1" if caveman_enabled() else b"caveman=0")
+    skip_next = False
+    for arg in args:
+        if skip_next:
+            skip_next = False
+        elif arg in OUTPUT_FLAGS:
+            skip_next = True
+        elif os.path.isfile(arg):
+            digest.update(Path(arg).read_bytes())
+        else:
+            digest.update(arg.encode())
+    for template in templates:
+        # A step without its template fails anyway, so say so before anything runs
+        if not template.is_file():
+            raise SystemExit(f"❌ Template not found: {template}")
+        digest.update(template.read_bytes())
+    return digest.hexdigest()
+
+def unchanged_output(state, step, key, output, validation=None):
+    """Copy the output (and validation file) of an earlier run of step with the same key to this version and return it, if they still exist"""
+    previous = state.get(step)
+    if not previous or previous["key"] != key or not Path(previous["path"]).exists():
+        return None
+    # Steps that add validation findings are only reused together with the file they wrote
+    if validation and not Path(previous.get("validation", "")).is_file():
+        return None
+    print(f"♻️  Inputs unchanged since the last run, reusing {previous['path']}")
+    # Every version gets a complete set of documents
+    if Path(previous["path"]) != Path(output):
+        shutil.copyfile(previous["path"], output)
+        previous["path"] = str(output)
+    if validation and Path(previous["validation"]) != Path(validation):
+        shutil.copyfile(previous["validation"], validation)
+        previous["validation"] = str(validation)
+    return Path(output)
+
+def adapt_plan(client, product_idea, cached_idea, cached_plan, use_cache=True, model="gpt-4o-mini"):
+    """Adapt an action plan written for a similar product idea to a new one"""
+    prompt = f"""The action plan below was written for this product idea:
+{cached_idea}
+
+Adapt it to the following product idea. Keep the structure and level of detail, and change
+everything that is specific to the original idea (names, features, integrations, milestones).
+
+New product idea:
+{product_idea}
+
+Action plan:
+{cached_plan}
+"""
+    return cached_chat(
+        client,
+        use_cache,
+        model=model,
+        messages=[
+            {"role": "system", "content": caveman("You are a pragmatic Technical Lead collaborating with a Senior Product Manager. Generate actionable, implementation-focused content.")},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7
+    )
+
+def one_shot(client, product_idea, required=(), use_cache=True, model="gpt-4o"):
+    """Generate every pipeline document with a single request, returning {document key: markdown}
+
+    Stops with an error if a document in required is missing from the reply.
+    """
+    sections = "\n".join(
+        f"<!-- SECTION:{sentinel} -->\n{description}"
+        for sentinel, _, description in ONE_SHOT_DOCUMENTS.values()
+    )
+    prompt = caveman("""Write the complete planning documents for the product idea below, in markdown.
+Each document builds on the ones before it, so keep names, components and milestones consistent.
+Start each document with its marker line exactly as shown, in this order:
+
+{sections}
+
+Product idea:
+{product_idea}
+""").format(sections=sections, product_idea=product_idea)
+    request = dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": caveman("You are a pragmatic Technical Lead collaborating with a Senior Product Manager. Generate actionable, implementation-focused content.")},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=16000
+    )
+    response = cached_chat(client, use_cache, **request)
     
-    # Look for existing files with version numbers
-    existing_versions = []
-    for file in output_dir.glob("*_v*.md"):
-        # Extract version number from filename like "prd_v1.md" -> 1
-        parts = file.stem.split('_v')
-        if len(parts) >= 2 and parts[-1].isdigit():
-            existing_versions.append(int(parts[-1]))
-    
-    if not existing_versions:
-        return 1
+    # re.split with a capture group alternates sentinel names and document bodies
+    parts = SECTION_RE.split(response)[1:]
+    documents = {name: body.strip() for name, body in zip(parts[::2], parts[1::2])}
+    documents = {key: documents.get(sentinel, "") for key, (sentinel, _, _) in ONE_SHOT_DOCUMENTS.items()}
     
-    return max(existing_versions) + 1
+    missing = [key for key in required if not documents[key]]
+    if missing:
+        # Don't let the next run read the same incomplete reply back from the cache
+        evict(request)
+        raise SystemExit(
+            f"❌ One-shot response is missing the {', '.join(key.upper() for key in missing)} section(s). "
+            "It was not cached, so rerunning requests a new one (add --no-cache to bypass the cache entirely). Stopping pipeline."
+        )
+    return documents
 
 def main():
     parser = argparse.ArgumentParser(description='Generate complete PRD, Technical Specification, Action Plan, and Milestone Specifications')
@@ -78,51 +254,108 @@ def main():
     parser.add_argument('--skip-action-plan', action='store_true', help='Skip Action Plan generation')
     parser.add_argument('--skip-milestones', action='store_true', help='Skip Milestone Specifications generation')
     parser.add_argument('--skip-gtm', action='store_true', help='Skip Go-To-Market Plan generation')
+    parser.add_argument('--no-cache', action='store_true', help='Regenerate every step instead of reusing cached completions and unchanged outputs')
+    parser.add_argument('--force', action='store_true', help='Rerun every step even if its inputs are unchanged since the last run (cached completions are still used)')
+    parser.add_argument('--model', default='gpt-4o-mini', help='OpenAI model for the PRD, Action Plan, Milestones and GTM steps (default: gpt-4o-mini)')
+    parser.add_argument('--spec-model', default='gpt-4o', help='OpenAI model for the Technical Specification step (default: gpt-4o)')
+    parser.add_argument('--use-plan-cache', action='store_true', help='Adapt the action plan of a similar earlier product idea instead of running the full pipeline, and remember new plans')
+    parser.add_argument('--plan-similarity', type=float, default=0.90, help='Minimum cosine similarity for reusing a cached plan (default: 0.90)')
+    parser.add_argument('--batch', action='store_true', help='Generate PRD and Technical Specification sections through the OpenAI Batch API (half the cost, may take up to 24h per job; for unattended runs)')
+    parser.add_argument('--legacy-subprocess', action='store_true', help='Run each step in its own Python process instead of in-process')
+    parser.add_argument('--one-shot', action='store_true', help='Generate all documents with a single request on --spec-model instead of one request per section (cheaper, less detailed)')
     
     args = parser.parse_args()
     
+    # Temporary files are removed however the run ends, including sys.exit() on a failed step
+    with tempfile.TemporaryDirectory(prefix='kaia_master_') as temp_dir:
+        run_pipeline(args, Path(temp_dir))
+
+def run_pipeline(args, temp_dir):
+    """Run the pipeline for the parsed command line arguments, keeping temporary files in temp_dir"""
     # Create output directory
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Generate version suffix if not provided
     if not args.version:
-        args.version = str(get_next_version(output_dir))
+        args.version = f"v{get_next_version(output_dir)}"
+    
+    # One OpenAI client shared by every step
+    client = get_client()
     
     print(f"🎯 Starting complete automation pipeline")
     print(f"📁 Output directory: {output_dir}")
     print(f"🏷️  Version: {args.version}")
     
+    # Flags forwarded to the scripts that cache completions
+    cache_args = ["--no-cache"] if args.no_cache else []
+    model_args = ["--model", args.model]
+    
     # Track generated files for next steps
     generated_files = {}
-    temp_files = []  # Track temporary files for cleanup
+    # Step keys of earlier runs, updated step by step; --force and --no-cache rerun every step
+    # without reusing outputs, but keep the entries of the steps this run doesn't reach
+    state = load_state(output_dir)
+    reuse = not (args.no_cache or args.force)
     
     # Check if product_idea is a file path or raw text
     product_idea_input = Path(args.product_idea)
     if not product_idea_input.exists() or not product_idea_input.is_file():
         # It's raw text, create a temporary file
-        temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
-        temp_file.write(args.product_idea)
-        temp_file.close()
-        product_idea_input = Path(temp_file.name)
-        temp_files.append(product_idea_input)
+        product_idea_input = temp_dir / "product_idea.txt"
+        product_idea_input.write_text(args.product_idea, encoding='utf-8')
+    
+    # Reuse the plan of a similar earlier idea, skipping the multi-section generation steps
+    plan_embedding = None
+    if args.use_plan_cache:
+        idea_text = read_text(product_idea_input).strip()
+        plan_embedding = embed(client, idea_text)
+        match = find_similar_plan(plan_embedding, args.plan_similarity)
+        if match:
+            similarity, cached_idea, cached_plan = match
+            print(f"♻️  Found a cached plan for a similar idea (similarity {similarity:.2f}), adapting it")
+            action_plan_output = output_dir / f"action_plan_{args.version}.md"
+            adapted_plan = adapt_plan(client, idea_text, cached_idea, cached_plan, use_cache=not args.no_cache, model=args.model)
+            with atomic_write(action_plan_output) as file:
+                file.write(adapted_plan)
+            generated_files['action_plan'] = action_plan_output
+            plan_embedding = None
+            args.skip_prd = args.skip_spec = args.skip_action_plan = args.skip_milestones = args.skip_gtm = True
+    
+    # Generate every document with one request instead of running the steps
+    if args.one_shot and not all((args.skip_prd, args.skip_spec, args.skip_action_plan, args.skip_milestones, args.skip_gtm)):
+        print(f"\n{'='*60}")
+        print(f"🚀 One-shot Generation")
+        print(f"{'='*60}")
+        required = [key for key in ONE_SHOT_DOCUMENTS if not getattr(args, f"skip_{key}")]
+        documents = one_shot(client, read_text(product_idea_input).strip(), required, use_cache=not args.no_cache, model=args.spec_model)
+        for key in required:
+            prefix = ONE_SHOT_DOCUMENTS[key][1]
+            output = output_dir / f"{prefix}_{args.version}.md"
+            with atomic_write(output) as file:
+                file.write(documents[key] + "\n")
+            generated_files[key] = output
+        print(f"✅ One-shot Generation completed successfully")
+        args.skip_prd = args.skip_spec = args.skip_action_plan = args.skip_milestones = args.skip_gtm = True
+    
+    # PRD and spec findings go to a validation file per version, so reruns never add to an earlier version's file
+    validation_output = output_dir / f"validation_tracking_{args.version}.md"
     
     # Step 1: Generate PRD
     if not args.skip_prd:
         prd_output = output_dir / f"prd_{args.version}.md"
-        success = run_script(
-            "prd_auto.py",
-            [str(product_idea_input), "--output", str(prd_output)],
-            "PRD Generation"
-        )
-        if success:
+        prd_template = TEMPLATES_DIR / "prd_instructions.csv"
+        prd_args = [str(product_idea_input), "--output", str(prd_output), "--validation-output", str(validation_output), "--template", str(prd_template)] + cache_args + model_args + (["--batch"] if args.batch else [])
+        prd_key = step_key("prd_auto", prd_args, [prd_template])
+        previous = reuse and unchanged_output(state, 'prd', prd_key, prd_output, validation_output)
+        if previous:
+            generated_files['prd'] = previous
+        elif run_script("prd_auto", prd_args, "PRD Generation", client, args.legacy_subprocess):
             generated_files['prd'] = prd_output
+            state['prd'] = {"key": prd_key, "path": str(prd_output), "validation": str(validation_output)}
+            save_state(output_dir, state)
         else:
             print("❌ PRD generation failed. Stopping pipeline.")
-            # Clean up temp files
-            for temp_file in temp_files:
-                if temp_file.exists():
-                    temp_file.unlink()
             sys.exit(1)
     else:
         print("⏭️  Skipping PRD generation")
@@ -130,113 +363,106 @@ def main():
     # Step 2: Generate Technical Specification
     if not args.skip_spec:
         spec_output = output_dir / f"tech_spec_{args.version}.md"
-        if 'prd' in generated_files:
-            # Use PRD as input
-            success = run_script(
-                "spec_auto.py",
-                [str(generated_files['prd']), "--output", str(spec_output)],
-                "Technical Specification Generation"
-            )
-        else:
-            # Use product idea directly (or temp file if it was raw text)
-            success = run_script(
-                "spec_auto.py",
-                [str(product_idea_input), "--output", str(spec_output)],
-                "Technical Specification Generation"
-            )
-        
-        if success:
+        # Use PRD as input, or the product idea directly (temp file if it was raw text)
+        spec_input = generated_files.get('prd', product_idea_input)
+        spec_template = TEMPLATES_DIR / "spec_instructions.csv"
+        spec_args = [str(spec_input), "--output", str(spec_output), "--validation-file", str(validation_output), "--template", str(spec_template), "--model", args.spec_model] + cache_args + (["--batch"] if args.batch else [])
+        spec_key = step_key("spec_auto", spec_args, [spec_template])
+        previous = reuse and unchanged_output(state, 'spec', spec_key, spec_output, validation_output)
+        if previous:
+            generated_files['spec'] = previous
+        elif run_script("spec_auto", spec_args, "Technical Specification Generation", client, args.legacy_subprocess):
             generated_files['spec'] = spec_output
+            state['spec'] = {"key": spec_key, "path": str(spec_output), "validation": str(validation_output)}
+            save_state(output_dir, state)
         else:
             print("❌ Technical Specification generation failed. Stopping pipeline.")
             sys.exit(1)
     else:
         print("⏭️  Skipping Technical Specification generation")
     
+    # Steps 3-5: Action Plan, Milestone Specifications and Go-To-Market Plan only
+    # depend on the Technical Specification and PRD, so they run concurrently
+    jobs = []
+    job_keys = []
+    
     # Step 3: Generate Action Plan
     if not args.skip_action_plan:
-        action_plan_output = output_dir / f"action_plan_{args.version}.md"
-        if 'spec' in generated_files and 'prd' in generated_files:
-            # Use both spec and PRD as input
-            success = run_script(
-                "action_plan_auto.py",
-                [str(generated_files['spec']), "--prd-file", str(generated_files['prd']), "--output", str(action_plan_output)],
-                "Action Plan Generation"
-            )
-        elif 'spec' in generated_files:
-            # Use only spec as input
-            success = run_script(
-                "action_plan_auto.py",
-                [str(generated_files['spec']), "--output", str(action_plan_output)],
-                "Action Plan Generation"
-            )
-        else:
+        if 'spec' not in generated_files:
             print("❌ Need Technical Specification for Action Plan generation")
             sys.exit(1)
-        
-        if success:
-            generated_files['action_plan'] = action_plan_output
-        else:
-            print("❌ Action Plan generation failed. Stopping pipeline.")
-            sys.exit(1)
+        action_plan_output = output_dir / f"action_plan_{args.version}.md"
+        # It runs alongside the other steps, so it doesn't stream to the terminal
+        action_plan_args = [str(generated_files['spec']), "--output", str(action_plan_output), "--no-stream"] + cache_args + model_args
+        if 'prd' in generated_files:
+            action_plan_args += ["--prd-file", str(generated_files['prd'])]
+        jobs.append(("action_plan_auto", action_plan_args, "Action Plan Generation"))
+        job_keys.append(('action_plan', action_plan_output, [TEMPLATES_DIR / "action_plan_template.md"]))
     else:
         print("⏭️  Skipping Action Plan generation")
     
     # Step 4: Generate Milestone Specifications
     if not args.skip_milestones:
-        milestone_output = output_dir / f"milestone_specs_{args.version}.md"
-        if 'spec' in generated_files and 'action_plan' in generated_files:
-            # Use both spec and action plan as input
-            success = run_script(
-                "milestones_auto.py",
-                [str(generated_files['spec']), "--action-plan-file", str(generated_files['action_plan']), "--output", str(milestone_output)],
-                "Milestone Specifications Generation"
-            )
-        elif 'spec' in generated_files:
-            # Use only spec as input
-            success = run_script(
-                "milestones_auto.py",
-                [str(generated_files['spec']), "--output", str(milestone_output)],
-                "Milestone Specifications Generation"
-            )
-        else:
+        if 'spec' not in generated_files:
             print("❌ Need Technical Specification for Milestone Specifications generation")
             sys.exit(1)
-        
-        if success:
-            generated_files['milestones'] = milestone_output
-        else:
-            print("❌ Milestone Specifications generation failed. Stopping pipeline.")
-            sys.exit(1)
+        milestone_output = output_dir / f"milestone_specs_{args.version}.md"
+        milestone_args = [str(generated_files['spec']), "--output", str(milestone_output)] + cache_args + model_args
+        if 'prd' in generated_files:
+            milestone_args += ["--prd-file", str(generated_files['prd'])]
+        jobs.append(("milestones_auto", milestone_args, "Milestone Specifications Generation"))
+        job_keys.append(('milestones', milestone_output, []))
     else:
         print("⏭️  Skipping Milestone Specifications generation")
     
     # Step 5: Generate Go-To-Market Plan
     if not args.skip_gtm:
-        gtm_output = output_dir / f"gtm_plan_{args.version}.md"
-        if 'prd' in generated_files:
-            # Use PRD as input
-            success = run_script(
-                "gtm_auto.py",
-                [str(generated_files['prd']), "--output", str(gtm_output)],
-                "Go-To-Market Plan Generation"
-            )
-        else:
-            # Use product idea directly (or temp file if it was raw text)
-            success = run_script(
-                "gtm_auto.py",
-                [str(product_idea_input), "--output", str(gtm_output)],
-                "Go-To-Market Plan Generation"
-            )
-        
-        if success:
-            generated_files['gtm'] = gtm_output
-        else:
-            print("❌ Go-To-Market Plan generation failed. Stopping pipeline.")
+        if 'spec' not in generated_files:
+            print("❌ Need Technical Specification for Go-To-Market Plan generation")
             sys.exit(1)
+        gtm_output = output_dir / f"gtm_plan_{args.version}.md"
+        # Use PRD as input, or the product idea directly (temp file if it was raw text)
+        gtm_prd = generated_files.get('prd', product_idea_input)
+        jobs.append((
+            "gtm_auto",
+            [str(gtm_prd), str(generated_files['spec']), "--output", str(gtm_output)] + cache_args + model_args,
+            "Go-To-Market Plan Generation"
+        ))
+        job_keys.append(('gtm', gtm_output, []))
     else:
         print("⏭️  Skipping Go-To-Market Plan generation")
     
+    # Reuse the outputs of steps whose inputs have not changed since the last run
+    pending_jobs = []
+    pending_keys = []
+    for job, (key, output, templates) in zip(jobs, job_keys):
+        job_key = step_key(job[0], job[1], templates)
+        previous = reuse and unchanged_output(state, key, job_key, output)
+        if previous:
+            generated_files[key] = previous
+        else:
+            pending_jobs.append(job)
+            pending_keys.append((key, output, job_key))
+    
+    failed = False
+    if pending_jobs:
+        results = asyncio.run(run_scripts_concurrently(pending_jobs, client, args.legacy_subprocess))
+        for (key, output, job_key), (_, _, description), success in zip(pending_keys, pending_jobs, results):
+            if success:
+                generated_files[key] = output
+                state[key] = {"key": job_key, "path": str(output)}
+            else:
+                print(f"❌ {description} failed.")
+                failed = True
+    save_state(output_dir, state)
+    if failed:
+        print("❌ Stopping pipeline.")
+        sys.exit(1)
+    
+    # Remember the new plan for similar ideas
+    if plan_embedding is not None and 'action_plan' in generated_files:
+        store_plan(plan_embedding, idea_text, read_text(generated_files['action_plan']))
+    
     # Summary
     print(f"\n{'='*60}")
     print(f"🎉 Complete automation pipeline finished successfully!")
@@ -252,11 +478,6 @@ def main():
         else:
             print(f"   ❌ {doc_type.upper()}: {file_path.name} (file not found)")
     
-    # Clean up temporary files
-    for temp_file in temp_files:
-        if temp_file.exists():
-            temp_file.unlink()
-    
     print(f"\n🚀 Next steps:")
     print(f"   1. Review the generated documents")
     print(f"   2. Customize as needed for your specific requirements")
@@ -4,32 +4,39 @@ Milestones Auto - Generate comprehensive milestone specifications from Technical
 Creates a single detailed milestone spec file for developers and AI agents
 """
 
-import os
 import sys
 import argparse
 import re
 from pathlib import Path
-from openai import OpenAI
-from dotenv import load_dotenv
+
+try:
+    from ._files import read_text, atomic_write
+    from ._llm_cache import cached_chat
+    from ._markdown import extract_sections
+    from ._compress import compress, estimate_tokens
+    from ._caveman import caveman
+    from ._openai_client import get_client
+except ImportError:  # run directly as a script
+    from _files import read_text, atomic_write
+    from _llm_cache import cached_chat
+    from _markdown import extract_sections
+    from _compress import compress, estimate_tokens
+    from _caveman import caveman
+    from _openai_client import get_client
+
+MILESTONE_RE = re.compile(r'<!-- MILESTONE_START -->(.*?)<!-- MILESTONE_END -->', re.DOTALL)
+MILESTONE_NAME_RE = re.compile(r'^## (Milestone.*)$', re.MULTILINE)
 
 def extract_milestones_from_action_plan(action_plan_content):
     """Extract milestone sections using structured markers"""
     milestones = []
     
     # Find all milestone sections using the markers
-    pattern = r'<!-- MILESTONE_START -->(.*?)<!-- MILESTONE_END -->'
-    matches = re.findall(pattern, action_plan_content, re.DOTALL)
-    
-    for i, match in enumerate(matches):
-        milestone_content = match.strip()
-        # Extract milestone name from the first line
-        lines = milestone_content.split('\n')
-        for line in lines:
-            if line.startswith('## Milestone'):
-                milestone_name = line.replace('## ', '').strip()
-                break
-        else:
-            milestone_name = f"Milestone {i}"
+    for i, match in enumerate(MILESTONE_RE.finditer(action_plan_content)):
+        milestone_content = match.group(1).strip()
+        # Take the name from the first "## Milestone" header
+        name_match = MILESTONE_NAME_RE.search(milestone_content)
+        milestone_name = name_match.group(1).strip() if name_match else f"Milestone {i}"
         
         milestones.append({
             'name': milestone_name,
@@ -39,78 +46,49 @@ def extract_milestones_from_action_plan(action_plan_content):
     print(f"Total milestones extracted: {len(milestones)}")
     return milestones
 
+# Minimal sets for unique, testable milestones
+TECH_SPEC_CRITICAL_SECTIONS = frozenset({
+    "Key Components",
+    "Data Flow & Sequence Diagrams",
+    "Data Models & Schemas",
+    "Implementation Roadmap",
+})
+PRD_CRITICAL_SECTIONS = frozenset({"User Requirements"})
+CRITICAL_SECTIONS = {"tech_spec": TECH_SPEC_CRITICAL_SECTIONS, "prd": PRD_CRITICAL_SECTIONS}
+
+# Prompt token budgets; longer sections are shortened by extractive compression
+SPEC_TOKEN_BUDGET = 4000
+PRD_TOKEN_BUDGET = 2000
+
+# --model auto: prompts under the threshold go to the small model, longer ones to the large model
+AUTO_MODEL_THRESHOLD = 2000
+AUTO_SMALL_MODEL = "gpt-4o-mini"
+AUTO_LARGE_MODEL = "gpt-4o"
+
+def pick_model(model, prompt):
+    """Resolve --model auto from the prompt size; any other model name is returned unchanged"""
+    if model != "auto":
+        return model
+    return AUTO_SMALL_MODEL if estimate_tokens(prompt) < AUTO_MODEL_THRESHOLD else AUTO_LARGE_MODEL
+
 def extract_critical_sections(content, content_type):
     """Extract only the most critical sections for milestone generation"""
-    
-    if content_type == "tech_spec":
-        # Minimal set for unique, testable milestones
-        critical_sections = [
-            "Key Components",
-            "Data Flow & Sequence Diagrams",
-            "Data Models & Schemas",
-            "Implementation Roadmap"
-        ]
-        
-        extracted_content = []
-        lines = content.split('\n')
-        current_section = None
-        in_critical_section = False
-        
-        for line in lines:
-            # Check if this is a section header
-            if line.startswith('## '):
-                section_name = line.replace('## ', '').strip()
-                if section_name in critical_sections:
-                    current_section = section_name
-                    in_critical_section = True
-                    extracted_content.append(f"\n{line}")
-                else:
-                    in_critical_section = False
-            elif in_critical_section:
-                extracted_content.append(line)
-        
-        return '\n'.join(extracted_content)
-    
-    elif content_type == "prd":
-        # Minimal set for unique, testable milestones
-        critical_sections = [
-            "User Requirements"
-        ]
-        
-        extracted_content = []
-        lines = content.split('\n')
-        current_section = None
-        in_critical_section = False
-        
-        for line in lines:
-            # Check if this is a section header
-            if line.startswith('## '):
-                section_name = line.replace('## ', '').strip()
-                if section_name in critical_sections:
-                    current_section = section_name
-                    in_critical_section = True
-                    extracted_content.append(f"\n{line}")
-                else:
-                    in_critical_section = False
-            elif in_critical_section:
-                extracted_content.append(line)
-        
-        return '\n'.join(extracted_content)
-    
+    if content_type in CRITICAL_SECTIONS:
+        return extract_sections(content, CRITICAL_SECTIONS[content_type])
     return content
 
-def generate_comprehensive_milestone_specs(client, tech_spec_content, prd_content):
-    """Generate comprehensive milestone specifications using OpenAI API"""
+def generate_comprehensive_milestone_specs(client, tech_spec_content, prd_content, model="gpt-4o-mini", use_cache=True, stream_to=()):
+    """Generate comprehensive milestone specifications using OpenAI API, streaming them to stream_to as they arrive"""
     
-    # Extract only critical sections to reduce token usage
-    critical_tech_spec = extract_critical_sections(tech_spec_content, "tech_spec")
-    critical_prd = extract_critical_sections(prd_content, "prd")
+    # Extract only critical sections, compressed to the prompt budget, to reduce token usage
+    critical_tech_spec = compress(extract_critical_sections(tech_spec_content, "tech_spec"), SPEC_TOKEN_BUDGET)
+    critical_prd = compress(extract_critical_sections(prd_content, "prd"), PRD_TOKEN_BUDGET)
     
     print(f"📊 Token optimization:")
-    print(f"   Technical Spec: {len(tech_spec_content.split())} words → {len(critical_tech_spec.split())} words")
-    print(f"   PRD: {len(prd_content.split())} words → {len(critical_prd.split())} words")
+    print(f"   Technical Spec: ~{estimate_tokens(tech_spec_content):,} tokens → ~{estimate_tokens(critical_tech_spec):,} tokens")
+    print(f"   PRD: ~{estimate_tokens(prd_content):,} tokens → ~{estimate_tokens(critical_prd):,} tokens")
     
-    prompt = f"""You are an expert Technical Lead creating milestone specifications for developers.
+    prompt = caveman("""You are an expert Technical Lead creating milestone specifications for developers.
 
 TECHNICAL SPECIFICATION:
 {critical_tech_spec}
@@ -141,24 +119,29 @@ Create 3-6 logical development milestones with this structure for each:
 - External services and APIs
 - Internal system dependencies
 
-Focus on WHAT to build and HOW to build it. Make each milestone actionable for developers."""
+Focus on WHAT to build and HOW to build it. Make each milestone actionable for developers.""").format(critical_tech_spec=critical_tech_spec, critical_prd=critical_prd)
+    
+    model = pick_model(model, prompt)
+    print(f"   Model: {model}")
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
+        return cached_chat(
+            client,
+            use_cache,
+            stream_to,
+            model=model,
             messages=[
-                {"role": "system", "content": "You are an expert software architect creating detailed, actionable milestone specifications for development teams. Focus on specific technical implementation details and clear, step-by-step guidance."},
+                {"role": "system", "content": caveman("You are an expert software architect creating detailed, actionable milestone specifications for development teams. Focus on specific technical implementation details and clear, step-by-step guidance.")},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
             max_tokens=3000
         )
-        return response.choices[0].message.content
     except Exception as e:
         print(f"Error generating milestone specifications: {e}")
         return None
 
-def main():
+def main(argv=None, client=None):
     parser = argparse.ArgumentParser(description='Generate comprehensive milestone specifications from Technical Specification and PRD')
     parser.add_argument('tech_spec_file', help='Path to Technical Specification markdown file')
     parser.add_argument('--prd-file', help='Path to PRD file (optional)')
@@ -168,26 +151,17 @@ def main():
                        help='Output file path (default: output/milestone_specs.md)')
     parser.add_argument('--split-files', action='store_true', 
                        help='Split into individual milestone files (future enhancement)')
+    parser.add_argument('--model', default='gpt-4o-mini', help='OpenAI model, or "auto" to pick gpt-4o-mini or gpt-4o by prompt size (default: gpt-4o-mini)')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing a cached completion')
     
-    args = parser.parse_args()
-    
-    # Load environment variables
-    load_dotenv()
-    
-    # Check for API key
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        print("Error: OPENAI_API_KEY not found in environment variables")
-        print("Please set your OpenAI API key in a .env file or environment variable")
-        sys.exit(1)
+    args = parser.parse_args(argv)
     
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
+    if client is None:
+        client = get_client()
     
-    # Read technical specification file
+    # Read technical specification file; no .strip(), section extraction is anchored on "## " headers
     try:
-        with open(args.tech_spec_file, 'r', encoding='utf-8') as file:
-            tech_spec_content = file.read().strip()
+        tech_spec_content = read_text(args.tech_spec_file)
     except FileNotFoundError:
         print(f"Error: Technical specification file '{args.tech_spec_file}' not found")
         sys.exit(1)
@@ -198,8 +172,7 @@ def main():
     # Determine PRD content
     if args.prd_file:
         try:
-            with open(args.prd_file, 'r', encoding='utf-8') as file:
-                prd_content = file.read().strip()
+            prd_content = read_text(args.prd_file)
         except FileNotFoundError:
             print(f"Error: PRD file '{args.prd_file}' not found")
             sys.exit(1)
@@ -216,32 +189,32 @@ Basic product requirements for milestone generation.
 Core user needs and functionality requirements.
 """
     
-    # Generate comprehensive milestone specifications
-    print("Generating comprehensive milestone specifications...")
-    
-    milestone_specs = generate_comprehensive_milestone_specs(
-        client, 
-        tech_spec_content, 
-        prd_content
-    )
-    
-    if not milestone_specs:
-        print("Failed to generate milestone specifications")
-        sys.exit(1)
-    
     # Create output directory if it doesn't exist
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Write milestone specifications
+    # Generate comprehensive milestone specifications, streaming them to the output file;
+    # it only replaces output_path once complete, so a failure never leaves a partial file
+    print("Generating comprehensive milestone specifications...")
     try:
-        with open(output_path, 'w', encoding='utf-8') as file:
-            file.write(milestone_specs)
-        print(f"✅ Generated comprehensive milestone specifications: {output_path}")
+        with atomic_write(output_path) as file:
+            milestone_specs = generate_comprehensive_milestone_specs(
+                client, 
+                tech_spec_content, 
+                prd_content,
+                model=args.model,
+                use_cache=not args.no_cache,
+                stream_to=(file,)
+            )
+            if not milestone_specs:
+                print("Failed to generate milestone specifications")
+                sys.exit(1)
     except Exception as e:
         print(f"Error writing milestone specifications: {e}")
         sys.exit(1)
     
+    print(f"✅ Generated comprehensive milestone specifications: {output_path}")
+    
     print(f"\n🎉 Milestone specifications generated successfully!")
     print(f"📁 Output file: {output_path}")
     
@@ -1,131 +1,298 @@
-from openai import OpenAI
-import pandas as pd
+#!/usr/bin/env python3
+"""
+PRD Auto - Generate Product Requirements Document from a product idea
+"""
+
+import csv
+import json
 import os
+import sys
 import argparse
-from dotenv import load_dotenv
+import asyncio
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Parse command line arguments
-parser = argparse.ArgumentParser(description='Generate PRD from input file')
-parser.add_argument('input_file', help='Path to the input text file containing the product idea')
-parser.add_argument('--template', default='templates/prd_instructions.csv', help='Path to the PRD template CSV file (default: templates/prd_instructions.csv)')
-parser.add_argument('--output', default='output/prd.md', help='Path to the output markdown file (default: output/prd.md)')
-parser.add_argument('--validation-output', default='output/validation_tracking.md', help='Path to the validation tracking file (default: output/validation_tracking.md)')
-args = parser.parse_args()
+try:
+    from ._llm_cache import cached_chat
+    from ._batch import batch_chat_list
+    from ._files import read_text
+    from ._caveman import caveman
+    from ._validation import write_validation_file
+    from ._openai_client import get_client, api_errors
+    from ._cli import positive_int
+except ImportError:  # run directly as a script
+    from _llm_cache import cached_chat
+    from _batch import batch_chat_list
+    from _files import read_text
+    from _caveman import caveman
+    from _validation import write_validation_file
+    from _openai_client import get_client, api_errors
+    from _cli import positive_int
 
-# Initialize OpenAI client with API key from environment variable
-api_key = os.getenv('OPENAI_API_KEY')
-if not api_key:
-    raise SystemExit("❌ OPENAI_API_KEY not found in environment variables. Please set it in .env file")
+# Identical for every section so all requests share the same cacheable prefix
+SYSTEM_PROMPT = (
+    "You are a product team writing a Product Requirements Document (PRD) one section at a time. "
+    "Each request gives the product idea and the sections written so far, followed by the instructions, "
+    "format and acceptance criteria for the next section. Write only that section, following its "
+    "instructions and format exactly; do not include the acceptance criteria in your answer."
+)
 
-client = OpenAI(api_key=api_key)
+def parse_dependencies(rows):
+    """Map each section to the set of sections it depends on.
 
-try:
-    client.models.list()  # cheap call, raises if key/org invalid or no quota
-except openai.AuthenticationError:
-    raise SystemExit("❌ Invalid API key or no billing set up.")
-except openai.RateLimitError:
-    raise SystemExit("❌ API quota exhausted. Add credits in the dashboard.")
-
-# Load PRD template
-df = pd.read_csv(args.template)
-
-# Load raw product idea
-with open(args.input_file, "r") as f:
-    product_idea = f.read().strip()
-
-# Start context with raw input
-cumulative_context = f"Product Idea:\n{product_idea}"
-
-# Store each output
-section_outputs = {}
-
-# Initialize validation tracking file
-def init_validation_file(validation_file):
-    """Initialize the validation tracking file."""
-    os.makedirs(os.path.dirname(validation_file), exist_ok=True)
-    with open(validation_file, "w") as f:
-        f.write("# Technical Validation Tracking\n\n")
-        f.write("This document tracks validation findings and corrections applied to the technical architecture.\n\n")
-        f.write("## Validation Findings by Section\n\n")
-
-def add_validation_finding(validation_file, section, finding):
-    """Add a validation finding to the tracking file."""
-    with open(validation_file, "a") as f:
-        f.write(f"### {section}\n")
-        f.write(f"{finding}\n\n")
-
-# Initialize validation file
-init_validation_file(args.validation_output)
-
-# Iterate through each PRD section
-for _, row in df.iterrows():
-    section = row["Section"]
-    role = row["Role Emulated"]
-    prompt_instruction = row["Prompt Instruction"]
-    output_format = row["Output Format"]
-    acceptance = row["Acceptance Criteria"]
+    Uses the optional "Depends On" template column (semicolon-separated section
+    names). Without it, every section depends on all the ones before it, which
+    keeps the original fully sequential cumulative context.
+    """
+    sections = [row["Section"] for row in rows]
+    deps = {}
+    for i, row in enumerate(rows):
+        if "Depends On" in row:
+            value = row["Depends On"]
+            names = value.split(";") if isinstance(value, str) else []
+            deps[row["Section"]] = {name.strip() for name in names if name.strip()}
+        else:
+            deps[row["Section"]] = set(sections[:i])
 
-    # Build full prompt (include acceptance criteria for AI guidance but don't output them)
-    full_prompt = f"""{prompt_instruction}
+    for section, prereqs in deps.items():
+        unknown = prereqs - set(sections)
+        if unknown:
+            raise SystemExit(f"❌ Section '{section}' depends on unknown section(s): {', '.join(sorted(unknown))}")
+    return deps
 
-{cumulative_context}
+def section_instructions(row):
+    """Return the instruction, format and acceptance criteria block for a section."""
+    return caveman(f"""{row["Prompt Instruction"]}
 
 Format:
-{output_format}
+{row["Output Format"]}
 
 Acceptance Criteria:
-{acceptance}
-"""
-
-    print(f"\nRunning section: {section}...\n")
+{row["Acceptance Criteria"]}
+""")
 
-    # Call OpenAI chat completion API
-    response = client.chat.completions.create(
-        model="gpt-4",
+def section_request(row, context, model="gpt-4o-mini"):
+    """Return the chat completion request for a single PRD section."""
+    # Include acceptance criteria for AI guidance but don't output them.
+    # The context is its own message, ahead of the section-specific one: it is shared, in
+    # template order, by every section that builds on the same prerequisites, so consecutive
+    # requests start with the same prefix and can hit OpenAI's prompt cache, and the context
+    # is never copied into a combined prompt string.
+    return dict(
+        model=model,
         messages=[
-            {"role": "user", "content": full_prompt}
+            {"role": "system", "content": caveman(SYSTEM_PROMPT)},
+            {"role": "user", "content": context},
+            {"role": "user", "content": section_instructions(row)}
         ],
         temperature=0.7
     )
 
-    output = response.choices[0].message.content
-
-    # Store and extend context
-    section_outputs[section] = output
-    cumulative_context += f"\n\n--- {section} ---\n{output}"
-
-    # Add validation finding if this is a validation section
-    if "Validation" in section:
-        add_validation_finding(args.validation_output, section, output)
-
-    print(f"\n--- {section.upper()} COMPLETE ---\n")
-    print(output)
-    print("\n" + "="*60 + "\n")
-
-# Ensure output directory exists
-os.makedirs(os.path.dirname(args.output), exist_ok=True)
-
-# Write to markdown file (without acceptance criteria)
-with open(args.output, "w") as out_file:
-    out_file.write("# Product Requirements Document (PRD)\n\n")
-    out_file.write("This document outlines the product requirements and specifications.\n\n")
-    
-    for section, content in section_outputs.items():
-        out_file.write(f"## {section}\n\n{content}\n\n")
-
-# Add final sections to validation file
-with open(args.validation_output, "a") as f:
-    f.write("## Corrections Applied\n\n")
-    f.write("*This section will be updated after post-generation corrections are applied.*\n\n")
-    f.write("### Architecture Changes Made\n")
-    f.write("- *Pending correction analysis*\n\n")
-    f.write("### Validation Issues Resolved\n")
-    f.write("- *Pending correction analysis*\n\n")
-    f.write("### Remaining Open Issues\n")
-    f.write("- *Pending correction analysis*\n")
-
-print(f"✅ PRD generated: {args.output}")
-print(f"✅ Validation tracking started: {args.validation_output}")
+async def run_section(client, row, context, semaphore, use_cache=True, stream_to=(), model="gpt-4o-mini"):
+    """Generate a single PRD section, streaming it to stream_to as it arrives."""
+    section = row["Section"]
+
+    async with semaphore:
+        print(f"\nRunning section: {section}...\n")
+
+        # Call OpenAI chat completion API; the client is synchronous (and shared
+        # with the other pipeline stages), so run it in a worker thread
+        output = await asyncio.to_thread(
+            cached_chat, client, use_cache, stream_to, **section_request(row, context, model)
+        )
+
+    return {section: output}
+
+async def run_section_batch(client, group_rows, contexts, use_cache=True, model="gpt-4o-mini"):
+    """Generate independent PRD sections as one OpenAI Batch API job."""
+    names = [row["Section"] for row in group_rows]
+    print(f"\nRunning sections (batch): {', '.join(names)}...\n")
+
+    requests = [section_request(row, contexts[row["Section"]], model) for row in group_rows]
+    results = await asyncio.to_thread(batch_chat_list, client, requests, use_cache)
+    return dict(zip(names, results))
+
+async def run_section_group(client, group_rows, context, semaphore, use_cache=True, model="gpt-4o-mini"):
+    """Generate several independent PRD sections with one JSON-mode request.
+
+    Saves a round-trip and a copy of the shared prompt prefix per extra section.
+    Any section missing from the reply is generated on its own afterwards.
+    """
+    names = [row["Section"] for row in group_rows]
+    blocks = "\n".join(f"### {row['Section']}\n{section_instructions(row)}" for row in group_rows)
+    instructions = f"""Write the following sections. Produce a JSON object with exactly these keys: {json.dumps(names, ensure_ascii=False)}.
+The value for each key is that section's content as a markdown string, following the matching instruction block below.
+
+{blocks}"""
+
+    async with semaphore:
+        print(f"\nRunning sections: {', '.join(names)}...\n")
+
+        output = await asyncio.to_thread(
+            cached_chat,
+            client,
+            use_cache,
+            model=model,
+            messages=[
+                {"role": "system", "content": caveman(SYSTEM_PROMPT)},
+                {"role": "user", "content": context},
+                {"role": "user", "content": instructions}
+            ],
+            temperature=0.7,
+            response_format={"type": "json_object"}
+        )
+
+    try:
+        parsed = json.loads(output)
+    except (TypeError, json.JSONDecodeError):
+        parsed = {}
+    if not isinstance(parsed, dict):
+        parsed = {}
+    outputs = {name: parsed[name] for name in names if isinstance(parsed.get(name), str) and parsed[name].strip()}
+
+    # Fall back to one request per section for anything the combined reply left out
+    missing = [row for row in group_rows if row["Section"] not in outputs]
+    if missing:
+        print(f"⚠️  Combined reply missing {', '.join(row['Section'] for row in missing)}; generating separately")
+        for result in await asyncio.gather(*(run_section(client, row, context, semaphore, use_cache, model=model) for row in missing)):
+            outputs.update(result)
+
+    return outputs
+
+async def generate_sections(client, rows, product_idea, out_file, max_concurrency, use_cache=True, combine=False, batch=False, model="gpt-4o-mini"):
+    """Run every section as soon as the sections it depends on are done.
+
+    Completed sections are appended to out_file in template order as soon as
+    every section before them is done, so an interrupted run keeps its progress.
+    With combine, sections that become ready together share one JSON-mode request;
+    with batch, they are submitted together as one Batch API job.
+    """
+    deps = parse_dependencies(rows)
+    order = [row["Section"] for row in rows]
+    rows_by_section = {row["Section"]: row for row in rows}
+    semaphore = asyncio.Semaphore(max_concurrency)
+    section_outputs = {}
+    # "--- Section ---" context blocks, formatted once per section and joined per prompt
+    context_parts = {}
+    pending = {}
+    next_to_write = 0
+
+    # Stream tokens to the terminal only when sections run one at a time,
+    # otherwise concurrent sections would interleave; they are printed whole instead
+    stream_to = (sys.stdout,) if max_concurrency == 1 and not batch else ()
+
+    # Start context with raw input
+    base_context = f"Product Idea:\n{product_idea}"
+
+    while len(section_outputs) < len(rows):
+        in_flight = {section for group in pending.values() for section in group}
+        ready = [
+            section for section in order
+            if section not in section_outputs and section not in in_flight
+            and deps[section] <= section_outputs.keys()
+        ]
+        groups = [ready] if (combine or batch) and len(ready) > 1 else [[section] for section in ready]
+
+        for group in groups:
+            if batch:
+                # Every section keeps its own context; only the transport is shared
+                contexts = {
+                    section: "\n\n".join(
+                        [base_context] + [context_parts[name] for name in order if name in deps[section]]
+                    )
+                    for section in group
+                }
+                coro = run_section_batch(client, [rows_by_section[section] for section in group], contexts, use_cache, model)
+                pending[asyncio.create_task(coro)] = group
+                continue
+
+            # Context is the product idea plus the sections it directly builds on, in template order;
+            # earlier sections those depend on are already reflected in them and are not resent
+            needed = set().union(*(deps[section] for section in group))
+            context = "\n\n".join(
+                [base_context] + [context_parts[name] for name in order if name in needed]
+            )
+            if len(group) == 1:
+                coro = run_section(client, rows_by_section[group[0]], context, semaphore, use_cache, stream_to, model)
+            else:
+                coro = run_section_group(client, [rows_by_section[section] for section in group], context, semaphore, use_cache, model)
+            pending[asyncio.create_task(coro)] = group
+
+        if not pending:
+            raise SystemExit("❌ Circular section dependencies in template: " + ", ".join(s for s in order if s not in section_outputs))
+
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            group = pending.pop(task)
+            outputs = task.result()
+            for section in group:
+                output = outputs[section]
+                section_outputs[section] = output
+                context_parts[section] = f"--- {section} ---\n{output}"
+
+                print(f"\n--- {section.upper()} COMPLETE ---\n")
+                if not stream_to or len(group) > 1:
+                    print(output)
+                print("\n" + "="*60 + "\n")
+
+        # Write to markdown file (without acceptance criteria)
+        parts = []
+        while next_to_write < len(order) and order[next_to_write] in section_outputs:
+            section = order[next_to_write]
+            parts.append(f"## {section}\n\n{section_outputs[section]}\n\n")
+            next_to_write += 1
+        out_file.writelines(parts)
+        out_file.flush()
+        os.fsync(out_file.fileno())
+
+    return section_outputs
+
+def main(argv=None, client=None):
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description='Generate PRD from input file')
+    parser.add_argument('input_file', help='Path to the input text file containing the product idea')
+    parser.add_argument('--template', default='templates/prd_instructions.csv', help='Path to the PRD template CSV file (default: templates/prd_instructions.csv)')
+    parser.add_argument('--output', default='output/prd.md', help='Path to the output markdown file (default: output/prd.md)')
+    parser.add_argument('--validation-output', default='output/validation_tracking.md', help='Path to the validation tracking file (default: output/validation_tracking.md)')
+    parser.add_argument('--max-concurrency', type=positive_int, default=4, help='Maximum number of sections generated at once; 1 streams each section to the terminal (default: 4)')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing cached completions')
+    parser.add_argument('--model', default='gpt-4o-mini', help='OpenAI model used for every section (default: gpt-4o-mini)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--combine-sections', action='store_true', help='Generate sections that become ready at the same time with a single JSON-mode request')
+    mode.add_argument('--batch', action='store_true', help='Submit sections through the OpenAI Batch API (half the cost, may take up to 24h)')
+    args = parser.parse_args(argv)
+
+    if client is None:
+        client = get_client()
+
+    # Load PRD template
+    with open(args.template, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    # Load raw product idea
+    product_idea = read_text(args.input_file).strip()
+
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+
+    with open(args.output, "w") as out_file:
+        out_file.writelines([
+            "# Product Requirements Document (PRD)\n\n",
+            "This document outlines the product requirements and specifications.\n\n",
+        ])
+
+        # Generate sections, running independent ones concurrently and writing each as it completes
+        with api_errors():
+            section_outputs = asyncio.run(generate_sections(
+                client, rows, product_idea, out_file, args.max_concurrency, not args.no_cache,
+                args.combine_sections, args.batch, args.model
+            ))
+
+    # Write the validation tracking file once, with the findings of the validation sections in template order
+    write_validation_file(args.validation_output, [
+        (row["Section"], section_outputs[row["Section"]]) for row in rows if "Validation" in row["Section"]
+    ])
+
+    print(f"✅ PRD generated: {args.output}")
+    print(f"✅ Validation tracking started: {args.validation_output}")
+
+if __name__ == "__main__":
+    main()
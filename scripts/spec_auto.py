@@ -1,62 +1,40 @@
-from openai import OpenAI
-import pandas as pd
+#!/usr/bin/env python3
+"""
+Spec Auto - Generate Technical Specification from a PRD markdown file
+"""
+
+import csv
 import os
 import argparse
-from dotenv import load_dotenv
-import subprocess
+import asyncio
 import sys
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Parse command line arguments
-parser = argparse.ArgumentParser(description='Generate Technical Specification from PRD file')
-parser.add_argument('prd_file', help='Path to the PRD markdown file (required)')
-parser.add_argument('--template', default='templates/spec_instructions.csv', help='Path to the technical spec template CSV file (default: templates/spec_instructions.csv)')
-parser.add_argument('--output', default='output/tech_spec.md', help='Path to the output markdown file (default: output/tech_spec.md)')
-parser.add_argument('--validation-file', default='output/validation_tracking.md', help='Path to the validation tracking file to update (default: output/validation_tracking.md)')
-parser.add_argument('--product-idea', help='Path to original product idea file for additional context (optional)')
-parser.add_argument('--generate-action-plan', action='store_true', help='Automatically generate action plan after technical specification')
-args = parser.parse_args()
-
-# Initialize OpenAI client with API key from environment variable
-api_key = os.getenv('OPENAI_API_KEY')
-if not api_key:
-    raise SystemExit("❌ OPENAI_API_KEY not found in environment variables. Please set it in .env file")
-
-client = OpenAI(api_key=api_key)
-
 try:
-    client.models.list()  # cheap call, raises if key/org invalid or no quota
-except openai.AuthenticationError:
-    raise SystemExit("❌ Invalid API key or no billing set up.")
-except openai.RateLimitError:
-    raise SystemExit("❌ API quota exhausted. Add credits in the dashboard.")
-
-# Load technical spec template
-df = pd.read_csv(args.template)
+    from ._files import read_text, atomic_write
+    from ._llm_cache import cached_chat
+    from ._batch import batch_chat_list
+    from ._caveman import caveman
+    from ._validation import add_validation_finding
+    from ._openai_client import get_client, api_errors
+    from ._cli import positive_int
+    from .action_plan_auto import main as action_plan_main
+except ImportError:  # run directly as a script
+    from _files import read_text, atomic_write
+    from _llm_cache import cached_chat
+    from _batch import batch_chat_list
+    from _caveman import caveman
+    from _validation import add_validation_finding
+    from _openai_client import get_client, api_errors
+    from _cli import positive_int
+    from action_plan_auto import main as action_plan_main
 
-# Load PRD file (primary input)
-if not os.path.exists(args.prd_file):
-    raise SystemExit(f"❌ PRD file not found: {args.prd_file}")
-
-with open(args.prd_file, "r") as f:
-    prd_content = f.read().strip()
-
-# Load original product idea if provided (for additional context)
-product_idea_context = ""
-if args.product_idea and os.path.exists(args.product_idea):
-    with open(args.product_idea, "r") as f:
-        product_idea_context = f.read().strip()
-
-# Create base context with full PRD content
-base_context = f"PRD Content:\n{prd_content}"
-
-if product_idea_context:
-    base_context += f"\n\nOriginal Product Idea:\n{product_idea_context}"
-
-# Store each output
-section_outputs = {}
+# Sent first in every section request; the PRD context follows it, so sections share a long cacheable prefix
+SYSTEM_PROMPT = (
+    "You are an engineering team writing a Technical Specification one section at a time from a "
+    "Product Requirements Document (PRD). Each request gives the PRD and the specification sections "
+    "this one builds on, followed by the instructions, format and acceptance criteria for the next "
+    "section. Write only that section, following its instructions and format."
+)
 
 # Define context dependencies for spec sections
 context_dependencies = {
@@ -76,38 +54,13 @@ context_dependencies = {
     "Open Questions & Assumptions": []  # Can reference any previous sections
 }
 
-def add_validation_finding(validation_file, section, finding):
-    """Add a validation finding to the tracking file."""
-    if os.path.exists(validation_file):
-        with open(validation_file, "a") as f:
-            f.write(f"### {section}\n")
-            f.write(f"{finding}\n\n")
-    else:
-        print(f"⚠️  Validation file not found: {validation_file}")
-
-# Iterate through each technical spec section
-for _, row in df.iterrows():
-    section = row["Section"]
-    role = row["Role Emulated"]
-    prompt_instruction = row["Prompt Instruction"]
-    output_format = row["Output Format"]
-    acceptance = row["Acceptance Criteria"]
+def section_prompt(row):
+    """Return the instruction, format and acceptance criteria for one technical spec section"""
+    prompt_instruction = caveman(row["Prompt Instruction"])
+    output_format = caveman(row["Output Format"])
+    acceptance = caveman(row["Acceptance Criteria"])
 
-    # Build context with base context and dependent sections
-    dependent_sections = []
-    if section in context_dependencies:
-        for dep_section in context_dependencies[section]:
-            if dep_section in section_outputs:
-                dependent_sections.append(f"--- {dep_section} ---\n{section_outputs[dep_section]}")
-    
-    cumulative_context = base_context
-    if dependent_sections:
-        cumulative_context += f"\n\nDependent Sections:\n" + "\n\n".join(dependent_sections)
-
-    # Build full prompt
-    full_prompt = f"""{prompt_instruction}
-
-{cumulative_context}
+    return f"""{prompt_instruction}
 
 Format:
 {output_format}
@@ -116,76 +69,203 @@ Acceptance Criteria:
 {acceptance}
 """
 
-    print(f"\nRunning section: {section}...\n")
+def section_request(row, base_context, dependency_outputs, model="gpt-4o"):
+    """Return the chat completion request for one section, given the outputs of the sections it depends on"""
+    # Build context with base context and dependent sections
+    dependent_sections = [f"--- {dep} ---\n{output}" for dep, output in dependency_outputs.items()]
+    cumulative_context = base_context
+    if dependent_sections:
+        cumulative_context += f"\n\nDependent Sections:\n" + "\n\n".join(dependent_sections)
 
-    # Call OpenAI chat completion API
-    response = client.chat.completions.create(
-        model="gpt-4",
+    # The context is its own message, ahead of the section-specific one: every section starts with
+    # the same PRD text, so consecutive requests share a long prefix and can hit OpenAI's prompt cache,
+    # and the large context is never copied into a combined prompt string
+    return dict(
+        model=model,
         messages=[
-            {"role": "user", "content": full_prompt}
+            {"role": "system", "content": caveman(SYSTEM_PROMPT)},
+            {"role": "user", "content": cumulative_context},
+            {"role": "user", "content": section_prompt(row)}
         ],
         temperature=0.7
     )
 
-    output = response.choices[0].message.content
-
-    # Store output
-    section_outputs[section] = output
-
-    # Add validation finding if this is a validation section
-    if "Validation" in section or "CTO" in section:
-        add_validation_finding(args.validation_file, section, output)
+def section_dependencies(rows):
+    """Map each section to the sections it depends on; only earlier ones count, as when sections ran one after another"""
+    order = [row["Section"] for row in rows]
+    return {
+        section: [dep for dep in context_dependencies.get(section, []) if dep in order[:i]]
+        for i, section in enumerate(order)
+    }
 
+def print_section(section, output, streamed=False):
+    """Print a completed section; a section streamed to the terminal only gets its footer"""
     print(f"\n--- {section.upper()} COMPLETE ---\n")
-    print(output)
+    if not streamed:
+        print(output)
     print("\n" + "="*60 + "\n")
 
-# Ensure output directory exists
-os.makedirs(os.path.dirname(args.output), exist_ok=True)
+async def generate_sections(client, rows, base_context, max_concurrency, use_cache=True, model="gpt-4o"):
+    """Run every section as soon as the sections it depends on are done, returning {section: output} in template order"""
+    deps = section_dependencies(rows)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = {}
+
+    # Only a lone running section can stream to the terminal without mixing its tokens with another's;
+    # with more at once each is printed whole by print_section
+    stream_to = (sys.stdout,) if max_concurrency == 1 else ()
+
+    async def run(row):
+        section = row["Section"]
+        dependency_outputs = {dep: await tasks[dep] for dep in deps[section]}
+
+        async with semaphore:
+            print(f"\nRunning section: {section}...\n")
+
+            # The client is synchronous (and shared with the other pipeline stages), so call it in a worker thread
+            output = await asyncio.to_thread(
+                cached_chat, client, use_cache, stream_to, **section_request(row, base_context, dependency_outputs, model)
+            )
+
+        print_section(section, output, streamed=bool(stream_to))
+        return output
+
+    # Dependencies come earlier in the template, so their tasks exist before anything awaits them
+    for row in rows:
+        tasks[row["Section"]] = asyncio.create_task(run(row))
+    return dict(zip(tasks, await asyncio.gather(*tasks.values())))
+
+def generate_sections_batch(client, rows, base_context, use_cache=True, model="gpt-4o"):
+    """Submit sections through the Batch API, one job per dependency level, returning {section: output} in template order"""
+    deps = section_dependencies(rows)
+    levels = {}
+    for row in rows:
+        section = row["Section"]
+        levels[section] = 1 + max((levels[dep] for dep in deps[section]), default=-1)
+
+    section_outputs = {}
+    for level in range(max(levels.values(), default=-1) + 1):
+        level_rows = [row for row in rows if levels[row["Section"]] == level]
+        print(f"\nRunning sections (batch): {', '.join(row['Section'] for row in level_rows)}...\n")
+
+        requests = [
+            section_request(row, base_context, {dep: section_outputs[dep] for dep in deps[row["Section"]]}, model)
+            for row in level_rows
+        ]
+        for row, output in zip(level_rows, batch_chat_list(client, requests, use_cache)):
+            section_outputs[row["Section"]] = output
+            print_section(row["Section"], output)
+
+    return {row["Section"]: section_outputs[row["Section"]] for row in rows}
+
+def main(argv=None, client=None):
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description='Generate Technical Specification from PRD file')
+    parser.add_argument('prd_file', help='Path to the PRD markdown file (required)')
+    parser.add_argument('--template', default='templates/spec_instructions.csv', help='Path to the technical spec template CSV file (default: templates/spec_instructions.csv)')
+    parser.add_argument('--output', default='output/tech_spec.md', help='Path to the output markdown file (default: output/tech_spec.md)')
+    parser.add_argument('--validation-file', default='output/validation_tracking.md', help='Path to the validation tracking file to update (default: output/validation_tracking.md)')
+    parser.add_argument('--product-idea', help='Path to original product idea file for additional context (optional)')
+    parser.add_argument('--generate-action-plan', action='store_true', help='Automatically generate action plan after technical specification')
+    parser.add_argument('--max-concurrency', type=positive_int, default=4, help='Maximum number of sections generated at once; 1 streams each section to the terminal (default: 4)')
+    parser.add_argument('--batch', action='store_true', help='Submit sections through the OpenAI Batch API, one job per dependency level (half the cost, each job may take up to 24h)')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing cached completions')
+    parser.add_argument('--model', default='gpt-4o', help='OpenAI model; the spec needs the most reasoning, so it defaults to a larger model (default: gpt-4o)')
+    args = parser.parse_args(argv)
+
+    if client is None:
+        client = get_client()
+
+    # Load technical spec template
+    with open(args.template, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    # Load PRD file (primary input)
+    if not os.path.exists(args.prd_file):
+        raise SystemExit(f"❌ PRD file not found: {args.prd_file}")
+
+    prd_content = read_text(args.prd_file).strip()
+
+    # Load original product idea if provided (for additional context)
+    product_idea_context = ""
+    if args.product_idea and os.path.exists(args.product_idea):
+        with open(args.product_idea, "r") as f:
+            product_idea_context = f.read().strip()
+
+    # Create base context with full PRD content
+    base_context = f"PRD Content:\n{prd_content}"
+
+    if product_idea_context:
+        base_context += f"\n\nOriginal Product Idea:\n{product_idea_context}"
+
+    # Generate sections, running those whose dependencies are done concurrently
+    with api_errors():
+        if args.batch:
+            section_outputs = generate_sections_batch(client, rows, base_context, not args.no_cache, args.model)
+        else:
+            section_outputs = asyncio.run(generate_sections(
+                client, rows, base_context, args.max_concurrency, not args.no_cache, args.model
+            ))
+
+    # Add validation findings, in template order
+    for section, output in section_outputs.items():
+        if "Validation" in section or "CTO" in section:
+            add_validation_finding(args.validation_file, section, output)
+
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+
+    # Build the markdown document and write it in one call
+    parts = [
+        "# Technical Specification\n\n",
+        "This document provides detailed technical specifications based on the Product Requirements Document (PRD).\n\n",
+    ]
 
-# Write to markdown file
-with open(args.output, "w") as out_file:
-    out_file.write("# Technical Specification\n\n")
-    out_file.write("This document provides detailed technical specifications based on the Product Requirements Document (PRD).\n\n")
-    
     for section, content in section_outputs.items():
         # Skip validation sections in the spec output - they go to validation file only
         if "Validation" in section or "CTO" in section:
             continue
-        
+
         # Check if content already has the section title
         if content.strip().startswith(f"## {section}"):
             # Content already has the title, just write it as is
-            out_file.write(f"{content}\n\n")
+            parts.append(f"{content}\n\n")
         else:
             # Add the section title
-            out_file.write(f"## {section}\n\n{content}\n\n")
-
-# Generate action plan if requested
-if args.generate_action_plan:
-    print("\nGenerating Action Plan...")
-    try:
-        # Call the action plan script
-        action_plan_cmd = [
-            sys.executable, 'action_plan_auto.py',
-            args.output,
-            '--prd-file', args.prd_file,
-            '--output', 'output/action_plan.md'
-        ]
-        
-        if args.product_idea:
-            action_plan_cmd.extend(['--product-idea', args.product_idea])
-        
-        result = subprocess.run(action_plan_cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
+            parts.append(f"## {section}\n\n{content}\n\n")
+
+    with atomic_write(args.output) as out_file:
+        out_file.writelines(parts)
+
+    # Generate action plan if requested
+    if args.generate_action_plan:
+        print("\nGenerating Action Plan...")
+        try:
+            # Run the action plan step in-process with the shared client, handing it the
+            # spec and PRD already in memory instead of having it read them back from disk
+            action_plan_args = [args.output, '--prd-file', args.prd_file, '--output', 'output/action_plan.md']
+            if args.no_cache:
+                action_plan_args.append('--no-cache')
+            action_plan_main(
+                action_plan_args,
+                client=client,
+                spec_content="".join(parts).strip(),
+                prd_content=prd_content,
+            )
             print("✅ Action Plan generated successfully: output/action_plan.md")
-        else:
-            print(f"❌ Error generating action plan: {result.stderr}")
-            
-    except Exception as e:
-        print(f"❌ Error generating action plan: {e}")
-
-print(f"✅ Technical specification generated: {args.output}")
-if os.path.exists(args.validation_file):
-    print(f"✅ Validation findings added to: {args.validation_file}") 
\ No newline at end of file
+
+        except SystemExit as e:
+            # action_plan_auto reports failures through sys.exit()
+            if e.code in (None, 0):
+                print("✅ Action Plan generated successfully: output/action_plan.md")
+            else:
+                print(f"❌ Error generating action plan (exit code {e.code})")
+        except Exception as e:
+            print(f"❌ Error generating action plan: {e}")
+
+    print(f"✅ Technical specification generated: {args.output}")
+    if os.path.exists(args.validation_file):
+        print(f"✅ Validation findings added to: {args.validation_file}")
+
+if __name__ == "__main__":
+    main()
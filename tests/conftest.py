@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Local runs don't write .pyc files for the modules under test; CI (which sets CI) keeps its bytecode cache
+if not os.getenv("CI"):
+    sys.dont_write_bytecode = True
@@ -0,0 +1,99 @@
+import json
+import shutil
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts import _batch, _llm_cache
+from scripts._batch import batch_chat, batch_chat_list
+from scripts._llm_cache import cache_path
+
+def request(prompt):
+    return {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": prompt}]}
+
+class FakeBatchClient:
+    """Stand-in for the OpenAI files and batches APIs that answers "OUT <prompt>" in reverse order
+
+    Prompts in fail come back as error items: an HTTP error status, or no response at all.
+    """
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.uploads = []
+        self.files = types.SimpleNamespace(create=self.create_file, content=self.file_content)
+        self.batches = types.SimpleNamespace(create=self.create_batch, retrieve=self.retrieve_batch)
+
+    def create_file(self, file, purpose):
+        self.uploads.append([json.loads(line) for line in file[1].decode("utf-8").splitlines()])
+        return types.SimpleNamespace(id="file-in")
+
+    def create_batch(self, input_file_id, endpoint, completion_window):
+        return types.SimpleNamespace(id="batch-1", status="in_progress", output_file_id=None)
+
+    def retrieve_batch(self, batch_id):
+        return types.SimpleNamespace(id=batch_id, status="completed", output_file_id="file-out")
+
+    def file_content(self, file_id):
+        lines = []
+        # Batch output lines are not guaranteed to follow the input order
+        for i, line in enumerate(reversed(self.uploads[-1])):
+            prompt = line["body"]["messages"][-1]["content"]
+            if prompt not in self.fail:
+                body = {"choices": [{"message": {"content": f"OUT {prompt}"}}]}
+                item = {"custom_id": line["custom_id"], "response": {"status_code": 200, "body": body}, "error": None}
+            elif i % 2:
+                item = {"custom_id": line["custom_id"], "response": {"status_code": 500, "body": {"error": {"message": "server error"}}}, "error": None}
+            else:
+                item = {"custom_id": line["custom_id"], "response": None, "error": {"code": "batch_expired", "message": "expired"}}
+            lines.append(json.dumps(item))
+        return types.SimpleNamespace(text="\n".join(lines) + "\n")
+
+class TestBatchChat(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        for patcher in (
+            mock.patch.object(_llm_cache, "CACHE_DIR", self.cache_dir),
+            mock.patch.object(_batch, "CACHE_DIR", self.cache_dir),
+            mock.patch.object(_batch.time, "sleep"),
+            mock.patch("builtins.print"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_outputs_map_back_by_custom_id(self):
+        """Test that output lines are matched to their requests by custom_id, not by position"""
+        client = FakeBatchClient()
+        requests = {f"section-{i}": request(prompt) for i, prompt in enumerate(["A", "B", "C"])}
+        self.assertEqual(batch_chat(client, requests), {"section-0": "OUT A", "section-1": "OUT B", "section-2": "OUT C"})
+        self.assertEqual([line["custom_id"] for line in client.uploads[0]], ["section-0", "section-1", "section-2"])
+
+    def test_list_keeps_request_order(self):
+        """Test that batch_chat_list returns the texts in the order of its requests"""
+        client = FakeBatchClient()
+        self.assertEqual(batch_chat_list(client, [request(p) for p in ["A", "B", "C"]]), ["OUT A", "OUT B", "OUT C"])
+
+    def test_error_items_stop_the_run(self):
+        """Test that error items are named in the error, while successful items are still cached"""
+        client = FakeBatchClient(fail={"B", "C"})
+        requests = {"a": request("A"), "b": request("B"), "c": request("C")}
+        with self.assertRaises(SystemExit) as raised:
+            batch_chat(client, requests)
+        self.assertIn("b, c", str(raised.exception))
+        self.assertEqual(cache_path(requests["a"]).read_text(encoding="utf-8"), "OUT A")
+        self.assertFalse(cache_path(requests["b"]).exists())
+
+    def test_cached_requests_are_left_out(self):
+        """Test that cached requests are answered from the cache and only the rest are submitted"""
+        client = FakeBatchClient()
+        batch_chat(client, {"a": request("A")})
+        self.assertEqual(batch_chat(client, {"a": request("A"), "b": request("B")}), {"a": "OUT A", "b": "OUT B"})
+        self.assertEqual([line["custom_id"] for line in client.uploads[1]], ["b"])
+        self.assertEqual(batch_chat(client, {"a": request("A"), "b": request("B")}), {"a": "OUT A", "b": "OUT B"})
+        self.assertEqual(len(client.uploads), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import os
+import unittest
+from unittest import mock
+
+from scripts._caveman import caveman
+
+class TestCaveman(unittest.TestCase):
+
+    def test_off_by_default(self):
+        """Test that text is returned unchanged unless KAIA_CAVEMAN=1"""
+        with mock.patch.dict(os.environ, {"KAIA_CAVEMAN": ""}):
+            self.assertEqual(caveman("Please write a detailed plan."), "Please write a detailed plan.")
+
+    def test_rules(self):
+        """Test that filler is stripped while predicative adjectives are kept"""
+        cases = [
+            ("Please write the overview.", "write the overview."),
+            ("Could you list the risks?", "list the risks?"),
+            ("Perhaps add a summary.", "add a summary."),
+            ("Create a detailed, comprehensive plan.", "Create a plan."),
+            ("Write an extensive overview.", "Write an overview."),
+            ("Provide a thorough analysis.", "Provide an analysis."),
+            ("Create detailed, actionable milestone specifications.", "Create actionable milestone specifications."),
+            ("Be thorough and specific.", "Be thorough and specific."),
+            ("Be very detailed in your answer.", "Be very detailed in your answer."),
+            ("Keep it detailed.", "Keep it detailed."),
+        ]
+        with mock.patch.dict(os.environ, {"KAIA_CAVEMAN": "1"}):
+            for text, expected in cases:
+                with self.subTest(text=text):
+                    self.assertEqual(caveman(text), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from scripts._compress import compress, estimate_tokens, split_units
+
+def long_document(paragraphs=40):
+    """Return a markdown document well over a few hundred tokens, with a header, fence and table"""
+    lines = ["# Technical Specification", "", "## Key Components", ""]
+    for i in range(paragraphs):
+        lines.append(f"Component {i} handles requests for area {i}. It stores records in table t{i}. "
+                     f"Errors from service s{i} are retried. Metrics for c{i} are exported.")
+    lines += ["", "```python", "def handler(event):", "    return event", "```", "",
+              "| Field | Type |", "| --- | --- |", "| id | uuid |"]
+    return "\n".join(lines)
+
+class TestSplitUnits(unittest.TestCase):
+
+    def test_protected_lines_have_no_sentences(self):
+        """Test that headers, fenced code, tables and blank lines are kept whole as their prefix"""
+        text = "## Header\n```\nx = 1. y = 2.\n```\n| a | b |\n"
+        for prefix, pieces in split_units(text):
+            self.assertEqual(pieces, [], prefix)
+
+    def test_list_markers_and_bold_labels_are_prefix(self):
+        """Test that a list marker needs whitespace after it and that a bold label stays in the prefix"""
+        self.assertEqual(split_units("- Item one. Item two.")[0], ("- ", ["Item one.", "Item two."]))
+        self.assertEqual(split_units("  1. First. Second.")[0], ("  1. ", ["First.", "Second."]))
+        self.assertEqual(split_units("**Item:** First. Second.")[0], ("**Item:** ", ["First.", "Second."]))
+        self.assertEqual(split_units("- **Item**: First.")[0], ("- **Item**: ", ["First."]))
+        self.assertEqual(split_units("*Emphasis* first.")[0], ("", ["*Emphasis* first."]))
+
+class TestCompress(unittest.TestCase):
+
+    def test_text_under_budget_is_unchanged(self):
+        """Test that text already within the budget is returned as is"""
+        text = "## Title\n\nShort text. Another sentence."
+        self.assertIs(compress(text, 1000), text)
+
+    def test_budget_is_respected(self):
+        """Test that a long document is shortened to about the budget"""
+        text = long_document()
+        self.assertGreater(estimate_tokens(text), 1000)
+        for budget in (200, 400, 800):
+            with self.subTest(budget=budget):
+                # Joining kept sentences adds a space per sentence, which the budget doesn't count
+                self.assertLessEqual(estimate_tokens(compress(text, budget)), budget * 1.1)
+
+    def test_headers_fences_and_tables_are_kept(self):
+        """Test that protected lines survive compression verbatim"""
+        output = compress(long_document(), 200).split("\n")
+        for line in ["# Technical Specification", "## Key Components", "```python", "def handler(event):",
+                     "    return event", "```", "| Field | Type |", "| --- | --- |", "| id | uuid |"]:
+            self.assertIn(line, output)
+
+    def test_list_and_bold_prefixes_survive(self):
+        """Test that a line losing its first sentence keeps its list marker and bold label intact"""
+        text = "\n".join(
+            f"- **Item {i}:** the the the the the the the the. unique{i}x0 unique{i}x1 unique{i}x2 matters."
+            for i in range(60)
+        )
+        output = compress(text, 500).split("\n")
+        self.assertTrue(any("the the" not in line for line in output), "no line lost its first sentence")
+        for line in output:
+            self.assertRegex(line, r"^- \*\*Item \d+:\*\* (?!\*)")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import io
+import shutil
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts import _llm_cache
+from scripts._llm_cache import MAX_ATTEMPTS, MAX_BACKOFF, cache_path, cached_chat, create_with_retry
+
+class TransientError(Exception):
+    """Stands in for the SDK's retryable errors; code is the API error code"""
+
+    def __init__(self, code=None):
+        super().__init__(code or "transient")
+        self.code = code
+
+class ScriptedClient:
+    """Stand-in for the OpenAI client that raises the scripted errors in turn, then answers with reply"""
+
+    def __init__(self, errors=(), reply="OUT", finish_reason="stop"):
+        self.calls = 0
+        self.errors = list(errors)
+        self.reply = reply
+        self.finish_reason = finish_reason
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        if request.get("stream"):
+            words = self.reply.split(" ")
+            return iter(
+                types.SimpleNamespace(choices=[types.SimpleNamespace(
+                    delta=types.SimpleNamespace(content=word if i == 0 else " " + word),
+                    finish_reason=self.finish_reason if i == len(words) - 1 else None,
+                )])
+                for i, word in enumerate(words)
+            )
+        message = types.SimpleNamespace(content=self.reply)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message, finish_reason=self.finish_reason)])
+
+REQUEST = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Write a plan"}]}
+
+class RetryTestCase(unittest.TestCase):
+    """Treats TransientError as retryable and records the backoff sleeps instead of sleeping"""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(_llm_cache, "retryable_errors", lambda: (TransientError,)),
+            mock.patch.object(_llm_cache.time, "sleep"),
+            mock.patch("builtins.print"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.sleep = _llm_cache.time.sleep
+
+class TestCreateWithRetry(RetryTestCase):
+
+    def test_retries_transient_errors(self):
+        """Test that transient errors are retried with a jittered delay capped by the attempt's backoff"""
+        client = ScriptedClient(errors=[TransientError(), TransientError()])
+        response = create_with_retry(client, **REQUEST)
+        self.assertEqual(response.choices[0].message.content, "OUT")
+        self.assertEqual(client.calls, 3)
+        delays = [call.args[0] for call in self.sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        for attempt, delay in enumerate(delays, 1):
+            self.assertTrue(1 <= delay <= min(MAX_BACKOFF, 2 ** attempt), delay)
+
+    def test_gives_up_after_max_attempts(self):
+        """Test that the last error is raised once every attempt has failed"""
+        client = ScriptedClient(errors=[TransientError() for _ in range(MAX_ATTEMPTS)])
+        with self.assertRaises(TransientError):
+            create_with_retry(client, **REQUEST)
+        self.assertEqual(client.calls, MAX_ATTEMPTS)
+        self.assertEqual(self.sleep.call_count, MAX_ATTEMPTS - 1)
+
+    def test_insufficient_quota_is_not_retried(self):
+        """Test that an exhausted quota stops at the first attempt instead of backing off"""
+        client = ScriptedClient(errors=[TransientError("insufficient_quota")])
+        with self.assertRaises(TransientError):
+            create_with_retry(client, **REQUEST)
+        self.assertEqual(client.calls, 1)
+        self.sleep.assert_not_called()
+
+    def test_other_errors_are_not_retried(self):
+        """Test that errors outside retryable_errors() propagate immediately"""
+        client = ScriptedClient(errors=[ValueError("bad request")])
+        with self.assertRaises(ValueError):
+            create_with_retry(client, **REQUEST)
+        self.assertEqual(client.calls, 1)
+
+class TestCachedChat(RetryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        patcher = mock.patch.object(_llm_cache, "CACHE_DIR", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_writes_and_reuses_cache(self):
+        """Test that a completion is written to the cache and answers the same request later"""
+        client = ScriptedClient(reply="A plan")
+        self.assertEqual(cached_chat(client, **REQUEST), "A plan")
+        self.assertEqual(cache_path(REQUEST).read_text(encoding="utf-8"), "A plan")
+        self.assertEqual(cached_chat(client, **REQUEST), "A plan")
+        self.assertEqual(client.calls, 1)
+
+    def test_retried_completion_is_cached(self):
+        """Test that a completion that needed retries is cached like any other"""
+        client = ScriptedClient(errors=[TransientError()], reply="A plan")
+        self.assertEqual(cached_chat(client, **REQUEST), "A plan")
+        self.assertEqual(cache_path(REQUEST).read_text(encoding="utf-8"), "A plan")
+
+    def test_no_cache(self):
+        """Test that use_cache=False neither reads nor writes the cache"""
+        client = ScriptedClient(reply="A plan")
+        cached_chat(client, False, **REQUEST)
+        cached_chat(client, False, **REQUEST)
+        self.assertEqual(client.calls, 2)
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+
+    def test_truncated_completion_is_not_cached(self):
+        """Test that a completion cut off at max_tokens is returned but not cached"""
+        for stream_to in ((), (io.StringIO(),)):
+            with self.subTest(streamed=bool(stream_to)):
+                client = ScriptedClient(reply="A pl", finish_reason="length")
+                self.assertEqual(cached_chat(client, True, stream_to, **REQUEST), "A pl")
+                self.assertEqual(list(self.cache_dir.iterdir()), [])
+
+    def test_streamed_completion_is_cached(self):
+        """Test that a streamed completion reaches every sink and is cached whole"""
+        sinks = (io.StringIO(), io.StringIO())
+        client = ScriptedClient(reply="A full plan")
+        self.assertEqual(cached_chat(client, True, sinks, **REQUEST), "A full plan")
+        self.assertEqual([sink.getvalue() for sink in sinks], ["A full plan", "A full plan"])
+        self.assertEqual(cache_path(REQUEST).read_text(encoding="utf-8"), "A full plan")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import random
+import re
+import unittest
+
+from scripts import action_plan_auto, milestones_auto
+from scripts._markdown import extract_sections
+
+def baseline_extract_sections(content, names):
+    """The original line-by-line section extraction, kept as the reference behaviour"""
+    extracted_content = []
+    in_critical_section = False
+    for line in content.split('\n'):
+        if line.startswith('## '):
+            section_name = line.replace('## ', '').strip()
+            in_critical_section = section_name in names
+            if in_critical_section:
+                extracted_content.append(f"\n{line}")
+        elif in_critical_section:
+            extracted_content.append(line)
+    return '\n'.join(extracted_content)
+
+def baseline_extract_milestones(action_plan_content):
+    """The original milestone extraction, kept as the reference behaviour"""
+    milestones = []
+    matches = re.findall(r'<!-- MILESTONE_START -->(.*?)<!-- MILESTONE_END -->', action_plan_content, re.DOTALL)
+    for i, match in enumerate(matches):
+        milestone_content = match.strip()
+        for line in milestone_content.split('\n'):
+            if line.startswith('## Milestone'):
+                milestone_name = line.replace('## ', '').strip()
+                break
+        else:
+            milestone_name = f"Milestone {i}"
+        milestones.append({'name': milestone_name, 'content': milestone_content})
+    return milestones
+
+NAMES = ["Key Components", "Data Models & Schemas", "Implementation Roadmap", "User Requirements",
+         "Product Overview", "Purpose & Scope", "Security & Privacy", "Open Questions"]
+
+def random_document(rng):
+    """Return a random markdown document mixing wanted and unwanted sections with awkward header lines"""
+    lines = []
+    for _ in range(rng.randint(0, 30)):
+        name = rng.choice(NAMES)
+        lines.append(rng.choice([
+            f"## {name}", f"## {name}  ", f"##  {name}", f"### {name}", f"#{name}", f" ## {name}",
+            "Body text.", "- a list item", "", "  indented", "| a | b |", "```", "##", "## ",
+        ]))
+    text = "\n".join(lines)
+    return text + rng.choice(["", "\n", "\n\n"])
+
+def random_action_plan(rng):
+    """Return a random action plan with MILESTONE markers, named and unnamed milestones"""
+    parts = [rng.choice(["# Action Plan\n", "", "Intro text.\n"])]
+    for i in range(rng.randint(0, 5)):
+        body = rng.sample([
+            f"## Milestone {i} - Core", "## Milestone", "## Setup", "### Milestone nested", "Some text.",
+            "- task", "", " ## Milestone indented", "##Milestone tight",
+        ], rng.randint(0, 5))
+        parts.append("<!-- MILESTONE_START -->" + rng.choice(["\n", "", "  \n"]) + "\n".join(body)
+                     + rng.choice(["\n", ""]) + "<!-- MILESTONE_END -->\n")
+        parts.append(rng.choice(["", "Between milestones.\n"]))
+    return "".join(parts)
+
+class TestExtractSections(unittest.TestCase):
+
+    def test_matches_line_loop_baseline(self):
+        """Test that regex extraction gives the same output as the original line loop on random documents"""
+        rng = random.Random(1234)
+        for i in range(500):
+            content = random_document(rng)
+            names = frozenset(rng.sample(NAMES, rng.randint(0, 4)))
+            with self.subTest(document=i):
+                self.assertEqual(extract_sections(content, names), baseline_extract_sections(content, names))
+
+    def test_script_extractors_match_baseline(self):
+        """Test the action plan and milestone scripts' critical-section extractors against the line loop"""
+        rng = random.Random(5678)
+        for module in (action_plan_auto, milestones_auto):
+            for content_type, names in module.CRITICAL_SECTIONS.items():
+                for i in range(100):
+                    content = random_document(rng)
+                    with self.subTest(script=module.__name__, content_type=content_type, document=i):
+                        self.assertEqual(module.extract_critical_sections(content, content_type),
+                                         baseline_extract_sections(content, names))
+
+class TestExtractMilestones(unittest.TestCase):
+
+    def test_matches_baseline(self):
+        """Test that milestone extraction gives the same names and contents as the original implementation"""
+        rng = random.Random(91011)
+        for i in range(500):
+            content = random_action_plan(rng)
+            with self.subTest(document=i), contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(milestones_auto.extract_milestones_from_action_plan(content),
+                                 baseline_extract_milestones(content))
+
+if __name__ == '__main__':
+    unittest.main()
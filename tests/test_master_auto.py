@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts import master_auto
+from scripts.master_auto import one_shot, step_key, unchanged_output
+
+class ReplyClient:
+    """Stand-in for the OpenAI client that answers every request with the same text"""
+
+    def __init__(self, reply):
+        self.calls = 0
+        self.reply = reply
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.calls += 1
+        message = types.SimpleNamespace(content=self.reply)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message, finish_reason="stop")])
+
+class TestStepKey(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.idea = self.tmp / "idea.txt"
+        self.idea.write_text("A todo app")
+        self.template = self.tmp / "template.csv"
+        self.template.write_text("Section\nOverview\n")
+
+    def key(self, *extra_args):
+        return step_key("prd_auto", [str(self.idea), *extra_args], [self.template])
+
+    def test_output_path_is_excluded(self):
+        """Test that the --output value doesn't change the key, while other flags do"""
+        self.assertEqual(self.key("--output", "a.md"), self.key("--output", "b.md"))
+        self.assertNotEqual(self.key("--model", "gpt-4o"), self.key("--model", "gpt-4o-mini"))
+
+    def test_validation_file_is_excluded(self):
+        """Test that the validation file path and contents don't change the key"""
+        validation = self.tmp / "validation_tracking_v1.md"
+        validation.write_text("# Technical Validation Tracking\n")
+        before = self.key("--validation-output", str(validation))
+        validation.write_text("# Technical Validation Tracking\n\n### CTO Review\nOK\n")
+        self.assertEqual(self.key("--validation-output", str(validation)), before)
+        self.assertEqual(self.key("--validation-file", "other.md"), before)
+
+    def test_input_file_contents_are_hashed(self):
+        """Test that editing an input file changes the key"""
+        before = self.key()
+        self.idea.write_text("A calendar app")
+        self.assertNotEqual(self.key(), before)
+
+    def test_template_change_invalidates(self):
+        """Test that editing a template changes the key"""
+        before = self.key()
+        self.template.write_text("Section\nOverview\nGoals\n")
+        self.assertNotEqual(self.key(), before)
+
+    def test_missing_template(self):
+        """Test that a missing template stops the run instead of being left out of the key"""
+        self.template.unlink()
+        with self.assertRaises(SystemExit) as raised:
+            self.key()
+        self.assertIn(str(self.template), str(raised.exception))
+
+    def test_helper_change_invalidates(self):
+        """Test that editing a shared _*.py helper changes the key"""
+        scripts_dir = self.tmp / "scripts"
+        scripts_dir.mkdir()
+        shutil.copy(master_auto.SCRIPTS_DIR / "prd_auto.py", scripts_dir)
+        (scripts_dir / "_markdown.py").write_text("H2 = 1\n")
+        with mock.patch.object(master_auto, "SCRIPTS_DIR", scripts_dir):
+            before = self.key()
+            (scripts_dir / "_markdown.py").write_text("H2 = 2\n")
+            self.assertNotEqual(self.key(), before)
+
+    def test_caveman_mode_invalidates(self):
+        """Test that switching KAIA_CAVEMAN changes the key"""
+        with mock.patch.dict(os.environ, {"KAIA_CAVEMAN": ""}):
+            before = self.key()
+        with mock.patch.dict(os.environ, {"KAIA_CAVEMAN": "1"}):
+            self.assertNotEqual(self.key(), before)
+
+class TestUnchangedOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.previous = self.tmp / "prd_v1.md"
+        self.previous.write_text("# PRD\n")
+        self.state = {"prd": {"key": "abc", "path": str(self.previous)}}
+
+    def test_reuse_copies_to_new_version(self):
+        """Test that a matching key copies the earlier output to the new version path"""
+        output = self.tmp / "prd_v2.md"
+        with mock.patch("builtins.print"):
+            self.assertEqual(unchanged_output(self.state, "prd", "abc", output), output)
+        self.assertEqual(output.read_text(), "# PRD\n")
+        self.assertEqual(self.state["prd"]["path"], str(output))
+
+    def test_reuse_copies_validation_file(self):
+        """Test that a step with a validation file reuses it alongside its output, and needs it recorded"""
+        output = self.tmp / "prd_v2.md"
+        validation = self.tmp / "validation_tracking_v2.md"
+        self.assertIsNone(unchanged_output(self.state, "prd", "abc", output, validation))
+        previous_validation = self.tmp / "validation_tracking_v1.md"
+        previous_validation.write_text("### PRD Validation\nOK\n")
+        self.state["prd"]["validation"] = str(previous_validation)
+        with mock.patch("builtins.print"):
+            self.assertEqual(unchanged_output(self.state, "prd", "abc", output, validation), output)
+        self.assertEqual(validation.read_text(), "### PRD Validation\nOK\n")
+        self.assertEqual(self.state["prd"]["validation"], str(validation))
+
+    def test_no_reuse(self):
+        """Test that a different key, a missing earlier output or an unknown step is not reused"""
+        output = self.tmp / "prd_v2.md"
+        self.assertIsNone(unchanged_output(self.state, "prd", "other", output))
+        self.assertIsNone(unchanged_output(self.state, "spec", "abc", output))
+        self.previous.unlink()
+        self.assertIsNone(unchanged_output(self.state, "prd", "abc", output))
+        self.assertFalse(output.exists())
+
+class TestOneShot(unittest.TestCase):
+
+    def setUp(self):
+        cache_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, cache_dir)
+        patcher = mock.patch("scripts._llm_cache.CACHE_DIR", cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache_dir = cache_dir
+
+    def test_splits_documents(self):
+        """Test that the reply is split into documents by their section markers"""
+        client = ReplyClient("<!-- SECTION:PRD -->\n# PRD\n<!-- SECTION:SPEC -->\n# Spec\n")
+        documents = one_shot(client, "A todo app", ["prd", "spec"])
+        self.assertEqual(documents["prd"], "# PRD")
+        self.assertEqual(documents["spec"], "# Spec")
+        self.assertEqual(documents["gtm"], "")
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 1)
+
+    def test_incomplete_reply_is_not_cached(self):
+        """Test that a reply missing a required document stops the run and is dropped from the cache"""
+        client = ReplyClient("<!-- SECTION:PRD -->\n# PRD\n")
+        for _ in range(2):
+            with self.assertRaises(SystemExit) as raised:
+                one_shot(client, "A todo app", ["prd", "spec"])
+            self.assertIn("SPEC", str(raised.exception))
+            self.assertIn("--no-cache", str(raised.exception))
+            self.assertEqual(list(self.cache_dir.iterdir()), [])
+        self.assertEqual(client.calls, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import tempfile
+import threading
+import types
+import unittest
+
+from scripts._cli import positive_int
+from scripts.prd_auto import generate_sections, parse_dependencies
+
+def make_row(section, depends_on=None):
+    row = {"Section": section, "Prompt Instruction": f"Write {section}", "Output Format": "text", "Acceptance Criteria": "none"}
+    if depends_on is not None:
+        row["Depends On"] = depends_on
+    return row
+
+class FakeClient:
+    """Synchronous stand-in for the OpenAI client that records requests and answers "OUT <section>" """
+
+    def __init__(self, drop_from_combined=()):
+        self.requests = []
+        self.drop_from_combined = set(drop_from_combined)
+        self.lock = threading.Lock()
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        with self.lock:
+            self.requests.append(request)
+        prompt = request["messages"][-1]["content"]
+        if request.get("response_format", {}).get("type") == "json_object":
+            names = json.loads(prompt.split("exactly these keys: ", 1)[1].split("].", 1)[0] + "]")
+            content = json.dumps({name: f"OUT {name}" for name in names if name not in self.drop_from_combined})
+        else:
+            content = "OUT " + prompt.split("\n", 1)[0].removeprefix("Write ")
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    def context_for(self, section):
+        """Return the context message of the single-section request for section"""
+        for request in self.requests:
+            if request["messages"][-1]["content"].startswith(f"Write {section}\n"):
+                return request["messages"][-2]["content"]
+        raise AssertionError(f"no request for {section}")
+
+def run(client, rows, **kwargs):
+    """Run generate_sections quietly; return its outputs and what it wrote to the output file"""
+    with tempfile.TemporaryFile("w+") as out_file, contextlib.redirect_stdout(io.StringIO()):
+        outputs = asyncio.run(generate_sections(client, rows, "An idea", out_file, 4, use_cache=False, **kwargs))
+        out_file.seek(0)
+        return outputs, out_file.read()
+
+class TestParseDependencies(unittest.TestCase):
+
+    def test_depends_on_column(self):
+        """Test that Depends On lists semicolon-separated prerequisites"""
+        rows = [make_row("A", ""), make_row("B", "A"), make_row("C", " A ; B ")]
+        self.assertEqual(parse_dependencies(rows), {"A": set(), "B": {"A"}, "C": {"A", "B"}})
+
+    def test_without_column_depends_on_all_earlier(self):
+        """Test that without Depends On every section depends on all the ones before it"""
+        rows = [make_row("A"), make_row("B"), make_row("C")]
+        self.assertEqual(parse_dependencies(rows), {"A": set(), "B": {"A"}, "C": {"A", "B"}})
+
+    def test_unknown_dependency(self):
+        """Test that a dependency on a section not in the template is rejected"""
+        with self.assertRaises(SystemExit):
+            parse_dependencies([make_row("A", "Missing")])
+
+class TestGenerateSections(unittest.TestCase):
+
+    def test_template_order_and_direct_context(self):
+        """Test that sections are written in template order and get only their direct prerequisites as context"""
+        rows = [make_row("A", ""), make_row("B", ""), make_row("C", "A"), make_row("D", "C")]
+        client = FakeClient()
+        outputs, written = run(client, rows)
+        self.assertEqual(outputs, {name: f"OUT {name}" for name in "ABCD"})
+        self.assertEqual(written, "".join(f"## {name}\n\nOUT {name}\n\n" for name in "ABCD"))
+        self.assertIn("--- A ---\nOUT A", client.context_for("C"))
+        self.assertNotIn("--- B ---", client.context_for("C"))
+        self.assertIn("--- C ---\nOUT C", client.context_for("D"))
+        self.assertNotIn("--- A ---", client.context_for("D"))
+
+    def test_circular_dependencies(self):
+        """Test that a dependency cycle stops the run instead of hanging"""
+        rows = [make_row("A", ""), make_row("B", "C"), make_row("C", "B")]
+        with self.assertRaises(SystemExit) as raised:
+            run(FakeClient(), rows)
+        self.assertIn("Circular", str(raised.exception))
+
+    def test_combine_falls_back_for_missing_sections(self):
+        """Test that sections missing from a combined reply are generated separately"""
+        rows = [make_row("A", ""), make_row("B", ""), make_row("C", "")]
+        client = FakeClient(drop_from_combined={"B"})
+        outputs, written = run(client, rows, combine=True)
+        self.assertEqual(outputs, {name: f"OUT {name}" for name in "ABC"})
+        self.assertEqual(written, "".join(f"## {name}\n\nOUT {name}\n\n" for name in "ABC"))
+        self.assertEqual(len(client.requests), 2)
+
+class TestMaxConcurrency(unittest.TestCase):
+
+    def test_positive_int(self):
+        """Test that --max-concurrency accepts 1 or more and rejects the rest"""
+        self.assertEqual(positive_int("3"), 3)
+        for value in ("0", "-1", "x"):
+            with self.subTest(value=value), self.assertRaises((argparse.ArgumentTypeError, ValueError)):
+                positive_int(value)
+
+if __name__ == '__main__':
+    unittest.main()
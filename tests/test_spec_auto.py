@@ -0,0 +1,117 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts import _batch
+from scripts.spec_auto import generate_sections, generate_sections_batch
+from tests.test_batch import FakeBatchClient
+
+def make_row(section):
+    return {"Section": section, "Prompt Instruction": f"Write {section}", "Output Format": "text", "Acceptance Criteria": "none"}
+
+class FakeClient:
+    """Synchronous stand-in for the OpenAI client that answers "OUT <section>", slowly for the sections in delays, and records when each runs"""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.events = []
+        self.contexts = {}
+        self.lock = threading.Lock()
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        section = request["messages"][-1]["content"].split("\n", 1)[0].removeprefix("Write ")
+        with self.lock:
+            self.events.append(("start", section))
+            self.contexts[section] = request["messages"][-2]["content"]
+        time.sleep(self.delays.get(section, 0))
+        with self.lock:
+            self.events.append(("end", section))
+        if request.get("stream"):
+            delta = types.SimpleNamespace(content=f"OUT {section}")
+            return iter([types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])])
+        message = types.SimpleNamespace(content=f"OUT {section}")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+def run(client, rows, max_concurrency=4):
+    """Run generate_sections quietly without the completion cache or caveman mode"""
+    with mock.patch("builtins.print"), mock.patch.dict(os.environ, {"KAIA_CAVEMAN": ""}):
+        return asyncio.run(generate_sections(client, rows, "PRD Content:\nA PRD", max_concurrency, use_cache=False))
+
+ARCHITECTURE = "High-Level Architecture Diagram"
+ROWS = [make_row(name) for name in ["Purpose & Scope", ARCHITECTURE, "Key Components", "Data Models & Schemas", "Parsing & NLP Logic"]]
+
+class TestGenerateSections(unittest.TestCase):
+
+    def test_sections_wait_for_their_dependencies(self):
+        """Test that a section starts only after every section it depends on has finished"""
+        client = FakeClient(delays={ARCHITECTURE: 0.05})
+        run(client, ROWS)
+        position = {event: i for i, event in enumerate(client.events)}
+        for section, deps in {
+            "Key Components": [ARCHITECTURE],
+            "Data Models & Schemas": ["Key Components"],
+            "Parsing & NLP Logic": ["Key Components", "Data Models & Schemas"],
+        }.items():
+            for dep in deps:
+                with self.subTest(section=section, dep=dep):
+                    self.assertGreater(position[("start", section)], position[("end", dep)])
+        # Purpose & Scope needs nothing, so it doesn't wait for the slow architecture section
+        self.assertLess(position[("end", "Purpose & Scope")], position[("end", ARCHITECTURE)])
+
+    def test_template_order_and_dependency_context(self):
+        """Test that outputs come back in template order and each section gets only its dependencies as context"""
+        client = FakeClient(delays={"Purpose & Scope": 0.05})
+        outputs = run(client, ROWS)
+        self.assertEqual(list(outputs.items()), [(row["Section"], f"OUT {row['Section']}") for row in ROWS])
+        context = client.contexts["Parsing & NLP Logic"]
+        self.assertIn("--- Key Components ---\nOUT Key Components", context)
+        self.assertIn("--- Data Models & Schemas ---\nOUT Data Models & Schemas", context)
+        self.assertNotIn(f"--- {ARCHITECTURE} ---", context)
+        self.assertEqual(client.contexts["Purpose & Scope"], "PRD Content:\nA PRD")
+
+    def test_one_at_a_time(self):
+        """Test that max_concurrency=1 streams the sections one after another in template order"""
+        client = FakeClient()
+        with mock.patch("sys.stdout") as stdout:
+            outputs = run(client, ROWS, max_concurrency=1)
+        self.assertEqual(outputs[ARCHITECTURE], f"OUT {ARCHITECTURE}")
+        stdout.write.assert_any_call(f"OUT {ARCHITECTURE}")
+        expected = [(kind, row["Section"]) for row in ROWS for kind in ("start", "end")]
+        self.assertEqual(client.events, expected)
+
+class TestGenerateSectionsBatch(unittest.TestCase):
+
+    def setUp(self):
+        cache_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, cache_dir)
+        for patcher in (
+            mock.patch.object(_batch, "CACHE_DIR", cache_dir),
+            mock.patch.object(_batch.time, "sleep"),
+            mock.patch("builtins.print"),
+            mock.patch.dict(os.environ, {"KAIA_CAVEMAN": ""}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_one_job_per_dependency_level(self):
+        """Test that each batch job holds one dependency level and outputs come back in template order"""
+        client = FakeBatchClient()
+        outputs = generate_sections_batch(client, ROWS, "PRD Content:\nA PRD", use_cache=False)
+        levels = [[line["body"]["messages"][-1]["content"].split("\n", 1)[0].removeprefix("Write ") for line in upload]
+                  for upload in client.uploads]
+        self.assertEqual(levels, [["Purpose & Scope", ARCHITECTURE], ["Key Components"], ["Data Models & Schemas"], ["Parsing & NLP Logic"]])
+        self.assertEqual(list(outputs), [row["Section"] for row in ROWS])
+        self.assertTrue(outputs["Key Components"].startswith("OUT Write Key Components"))
+        context = client.uploads[3][0]["body"]["messages"][-2]["content"]
+        self.assertIn(f"--- Data Models & Schemas ---\n{outputs['Data Models & Schemas']}", context)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from scripts._validation import add_validation_finding, write_validation_file
+
+class TestAddValidationFinding(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.path = os.path.join(tmp, "validation_tracking.md")
+        write_validation_file(self.path, [("PRD Validation", "PRD finding")])
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_added_before_corrections(self):
+        """Test that a new finding goes after the existing ones, ahead of Corrections Applied"""
+        add_validation_finding(self.path, "CTO Technical Validation", "Spec finding")
+        content = self.read()
+        self.assertIn("### PRD Validation\nPRD finding\n\n### CTO Technical Validation\nSpec finding\n\n## Corrections Applied", content)
+
+    def test_rerun_replaces_finding(self):
+        """Test that adding a section's finding again replaces the earlier one instead of duplicating it"""
+        add_validation_finding(self.path, "CTO Technical Validation", "Old finding")
+        add_validation_finding(self.path, "CTO Technical Validation", "New finding")
+        content = self.read()
+        self.assertEqual(content.count("### CTO Technical Validation"), 1)
+        self.assertNotIn("Old finding", content)
+        self.assertIn("### PRD Validation\nPRD finding\n\n### CTO Technical Validation\nNew finding\n\n## Corrections Applied", content)
+
+if __name__ == '__main__':
+    unittest.main()